@@ -1,12 +1,88 @@
-from extensions import app
+#----------------------------------------------------------------------------#
+# Application factory
+#----------------------------------------------------------------------------#
+
+# `flask` finds create_app() on its own; WSGI servers call it directly, e.g.
+# gunicorn 'app:create_app()'. Only what every worker needs is imported here:
+# the route modules (and the queries, forms and models they pull in) load
+# when create_app() registers their blueprints, the CLI commands and
+# Flask-Migrate (and Alembic behind it) only for CLI commands, and Babel and
+# the asyncio engine the first time they are used. `flask startup-profile`
+# shows where the remaining import time goes.
+
+import importlib
+import os
+import warnings
+from collections.abc import Mapping
+from pathlib import Path
+
+import click
+from dotenv import load_dotenv
+from flask import Flask
+
+import assets
+import cache
+import compression
+import errors
+import filters
+import instrumentation
+import replicas
+import suggest
+import templating
+from extensions import db, moment
+from pooling import engine_options
+
+basedir = Path(__file__).resolve().parent
+
+ROUTE_MODULES = ('routes.main', 'routes.venues', 'routes.artists', 'routes.shows', 'routes.api')
+
+
+def create_app(config=None):
+    # config overrides config.py: a mapping or an object with upper-case
+    # attributes (tests, benchmarks, one-off scripts).
+    load_dotenv(basedir / '.env')
+    app = Flask(__name__)
+    app.config.from_object('config')
+    if isinstance(config, Mapping):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    if not app.config['SQLALCHEMY_DATABASE_URI']:
+        raise RuntimeError(
+            "DATABASE_URL is not set. Add it to a .env file or export it in your shell."
+        )
+    if not app.config['SECRET_KEY']:
+        # Sessions and CSRF tokens won't survive a restart or be shared
+        # between workers.
+        warnings.warn('SECRET_KEY is not set; using a random key for this process.')
+        app.config['SECRET_KEY'] = os.urandom(32)
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    replicas.init_app(app)
+    db.init_app(app)
+    moment.init_app(app)
+    cli = click.get_current_context(silent=True) is not None
+    if cli:
+        import commands
+        from flask_migrate import Migrate
+        Migrate(app, db)
+        commands.init_app(app)
+
+    for extension in (
+        filters, errors, instrumentation, compression, cache, assets, templating, suggest,
+    ):
+        extension.init_app(app)
+    for name in ROUTE_MODULES:
+        app.register_blueprint(importlib.import_module(name).bp)
+    app.register_blueprint(assets.bp)
 
-import filters  # noqa: F401
-import models  # noqa: F401
-import errors  # noqa: F401
-import routes.main  # noqa: F401
-import routes.venues  # noqa: F401
-import routes.artists  # noqa: F401
-import routes.shows  # noqa: F401
+    if app.config['TEMPLATE_WARMUP']:
+        templating.warm_templates(app)
+    if app.config['SUGGEST_WARMUP'] and not cli:
+        # CLI commands (`flask run` included) build on first use instead.
+        suggest.warm_suggest(app)
+    return app
 
 #----------------------------------------------------------------------------#
 # Launch.
@@ -14,11 +90,11 @@ import routes.shows  # noqa: F401
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Static asset bundles
+#----------------------------------------------------------------------------#
+
+# `flask assets build` concatenates each bundle below, minifies it, and writes
+# static/dist/<name>.<hash>.<ext> with a .gz twin and a manifest.json mapping
+# bundle names to those files. Templates call asset_urls('main.css'): with a
+# manifest they get the single fingerprinted URL, served precompressed and
+# cached for a year as immutable; without one (a dev checkout that was never
+# built) they get the source files unchanged. Old bundles are left in place
+# for pages that were cached while they were current.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+try:
+    import rjsmin
+except ImportError:  # optional: without it JS bundles are only concatenated
+    rjsmin = None
+
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # Deferred: runs after the page has been parsed and jQuery has loaded.
+    'app.js': [
+        'js/script.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/suggest.js',
+        'js/past_shows.js',
+    ],
+}
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+bp = Blueprint('assets', __name__)
+
+
+def dist_root(app):
+    return Path(app.static_folder, 'dist')
+
+
+def manifest_path(app):
+    return dist_root(app) / 'manifest.json'
+
+
+def minify_css(text):
+    # Comments and whitespace only. The bundle lives one directory below
+    # static/ like css/, so relative url()s keep resolving.
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    return rjsmin.jsmin(text) if rjsmin is not None else text
+
+
+def build_bundle(app, name, sources):
+    parts = [Path(app.static_folder, source).read_text(encoding='utf-8') for source in sources]
+    if name.endswith('.css'):
+        content = minify_css('\n'.join(parts))
+    else:
+        # `;` guards against a file that ends without one.
+        content = '\n;'.join(minify_js(part) for part in parts)
+    data = content.encode('utf-8')
+    stem, ext = name.rsplit('.', 1)
+    filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}'
+    (dist_root(app) / filename).write_bytes(data)
+    # mtime=0 keeps the .gz byte-identical across builds of the same content.
+    (dist_root(app) / f'{filename}.gz').write_bytes(gzip.compress(data, 9, mtime=0))
+    return filename, len(data)
+
+
+def build_assets(app):
+    dist_root(app).mkdir(exist_ok=True)
+    manifest = {}
+    sizes = {}
+    for name, sources in BUNDLES.items():
+        manifest[name], sizes[name] = build_bundle(app, name, sources)
+    manifest_path(app).write_text(json.dumps(manifest, indent=2) + '\n')
+    app.extensions['assets_manifest'] = manifest
+    return manifest, sizes
+
+
+def _load_manifest(app):
+    try:
+        return json.loads(manifest_path(app).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def asset_urls(name):
+    manifest = current_app.extensions['assets_manifest']
+    if name in manifest:
+        return [url_for('assets.dist_asset', filename=manifest[name])]
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+
+def init_app(app):
+    app.extensions['assets_manifest'] = _load_manifest(app)
+    app.add_template_global(asset_urls)
+
+
+@bp.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    root = dist_root(current_app)
+    mimetype = mimetypes.guess_type(filename)[0]
+    gzipped = (root / f'{filename}.gz').is_file()
+    if gzipped and 'gzip' in request.accept_encodings:
+        response = send_from_directory(
+            root, f'{filename}.gz', mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE
+        )
+        response.content_encoding = 'gzip'
+    else:
+        response = send_from_directory(root, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    response.expires = datetime.now(timezone.utc) + timedelta(seconds=IMMUTABLE_MAX_AGE)
+    return response
@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Async database access
+#----------------------------------------------------------------------------#
+
+# Used by the async detail views (DB_ASYNC_DETAIL_PAGES) to run independent
+# SELECTs concurrently on asyncpg, each on its own connection. Flask runs every
+# async view in a fresh event loop and asyncpg connections cannot move between
+# loops, so these engines do not pool: put PgBouncer in front of the database
+# when this mode is on. Needs `pip install asyncpg "flask[async]"`.
+
+import asyncio
+
+from flask import current_app, g
+from sqlalchemy.pool import NullPool
+
+from extensions import db
+from soft_delete import live_only
+
+try:
+    import asyncpg  # noqa: F401
+except ImportError:  # optional: only needed for DB_ASYNC_DETAIL_PAGES
+    asyncpg = None
+
+_engines = {}
+
+
+def _async_engine(sync_engine):
+    url = sync_engine.url
+    key = url.render_as_string(hide_password=False)
+    engine = _engines.get(key)
+    if engine is None:
+        if asyncpg is None:
+            raise RuntimeError('DB_ASYNC_DETAIL_PAGES needs the asyncpg package installed.')
+        # Imported here: sqlalchemy.ext.asyncio pulls in asyncio and greenlet
+        # support, which sync-only processes never need.
+        from sqlalchemy.ext.asyncio import create_async_engine
+        connect_args = {}
+        if current_app.config['DB_PGBOUNCER']:
+            # Transaction pooling cannot keep asyncpg's prepared statements.
+            connect_args['statement_cache_size'] = 0
+        elif current_app.config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['server_settings'] = {
+                'statement_timeout': str(current_app.config['DB_STATEMENT_TIMEOUT_MS']),
+            }
+        engine = _engines[key] = create_async_engine(
+            url.set(drivername='postgresql+asyncpg'),
+            poolclass=NullPool,
+            connect_args=connect_args,
+        )
+    return engine
+
+
+async def _fetch(engine, statement):
+    async with engine.connect() as connection:
+        result = await connection.execute(statement)
+        return result.all()
+
+
+async def fetch_all(*statements):
+    # One list of rows per statement, in order. Reads follow @read_replica
+    # and, like the session, skip soft-deleted venues and artists.
+    engine = _async_engine(g.get('replica_engine') or db.engine)
+    return await asyncio.gather(*(_fetch(engine, live_only(statement)) for statement in statements))
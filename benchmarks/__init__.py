@@ -0,0 +1,2 @@
+# Benchmarks. Run each module with `python -m benchmarks.<name>` from the
+# project root (the app config, and so .env, is loaded as usual).
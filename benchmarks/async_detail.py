@@ -0,0 +1,90 @@
+#----------------------------------------------------------------------------#
+# Sync vs async detail pages
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.async_detail [--concurrency 64] [--requests 2000]
+#
+# Serves the app from a threaded WSGI server and hammers /venues/<id> and
+# /artists/<id> with --concurrency parallel clients, once with the sync views
+# and once with the async ones (DB_ASYNC_DETAIL_PAGES), against the data in
+# DATABASE_URL (seed it with benchmarks.seed first). Prints throughput and
+# p50/p95 latency per mode as JSON. The page cache is off for both runs.
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from extensions import db
+from models import Venue, Artist
+from routes.artists import show_artist, show_artist_async
+from routes.venues import show_venue, show_venue_async
+
+MODES = {
+    'sync': {'venues.show_venue': show_venue, 'artists.show_artist': show_artist},
+    'async': {'venues.show_venue': show_venue_async, 'artists.show_artist': show_artist_async},
+}
+
+
+def _sample_paths(app, rng, count):
+    with app.app_context():
+        venue_ids = [v for v, in db.session.query(Venue.id).order_by(db.func.random()).limit(100)]
+        artist_ids = [a for a, in db.session.query(Artist.id).order_by(db.func.random()).limit(100)]
+        db.session.remove()
+    return [
+        f'/venues/{rng.choice(venue_ids)}' if i % 2 else f'/artists/{rng.choice(artist_ids)}'
+        for i in range(count)
+    ]
+
+
+def _get(base, path):
+    start = time.perf_counter()
+    with urllib.request.urlopen(base + path) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(app, mode, paths, concurrency):
+    app.view_functions.update(MODES[mode])
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    try:
+        _get(base, paths[0])  # warm up
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = sorted(pool.map(lambda path: _get(base, path), paths))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    return {
+        'requests_per_second': len(paths) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app({'PAGE_CACHE_ENABLED': False})
+    paths = _sample_paths(app, random.Random(args.seed), args.requests)
+    report = {'concurrency': args.concurrency, 'requests': args.requests}
+    for mode in MODES:
+        report[mode] = run(app, mode, paths, args.concurrency)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
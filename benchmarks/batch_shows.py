@@ -0,0 +1,90 @@
+#----------------------------------------------------------------------------#
+# Batch vs single show scheduling
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.batch_shows [--shows 100] [--repeat 5]
+#
+# Books a tour of --shows dates for one artist, once as that many POSTs to
+# /shows/create and once as a single JSON POST to /shows/batch, through the
+# Flask test client against the data in DATABASE_URL (seed it with
+# benchmarks.seed first). Prints the best wall time and the SQL statements
+# issued per run as JSON. Dates are spread a week apart far in the future so
+# nothing clashes, and every show created is deleted again afterwards.
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from extensions import db
+from models import Venue, Artist, Show
+
+
+def _tour(rng, venue_ids, artist_id, shows, run):
+    start = datetime(2200, 1, 1, 20, 0) + timedelta(days=7 * shows * run)
+    return [
+        {
+            'artist_id': str(artist_id),
+            'venue_id': str(rng.choice(venue_ids)),
+            'start_time': (start + timedelta(days=7 * i)).strftime('%Y-%m-%d %H:%M'),
+        }
+        for i in range(shows)
+    ]
+
+
+def _single(client, tour):
+    queries = 0
+    for row in tour:
+        response = client.post('/shows/create', data=row)
+        queries += int(response.headers.get('X-SQL-Queries', 0))
+    return queries
+
+
+def _batch(client, tour):
+    response = client.post('/shows/batch', json={'shows': tour})
+    assert response.status_code == 201, response.get_json()
+    return int(response.headers.get('X-SQL-Queries', 0))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shows', type=int, default=100, help='Dates per tour.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app({'SQL_TIMING_HEADERS': True, 'SUGGEST_WARMUP': False})
+    rng = random.Random(args.seed)
+    with app.app_context():
+        venue_ids = [v for v, in db.session.query(Venue.id).order_by(db.func.random()).limit(1000)]
+        artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+        db.session.remove()
+    client = app.test_client()
+    report = {'shows': args.shows, 'repeat': args.repeat}
+    run = 0
+    try:
+        for mode, book in (('single', _single), ('batch', _batch)):
+            timings = []
+            for _ in range(args.repeat):
+                tour = _tour(rng, venue_ids, artist_id, args.shows, run)
+                run += 1
+                started = time.perf_counter()
+                queries = book(client, tour)
+                timings.append((time.perf_counter() - started) * 1000)
+            report[mode] = {
+                'best_ms': min(timings),
+                'ms_per_show': min(timings) / args.shows,
+                'sql_statements': queries,
+            }
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Show).where(Show.start_time >= datetime(2200, 1, 1)))
+            db.session.commit()
+    report['speedup'] = report['single']['best_ms'] / report['batch']['best_ms']
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
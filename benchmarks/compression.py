@@ -0,0 +1,103 @@
+#----------------------------------------------------------------------------#
+# Response compression trade-off
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.compression [--shows 50] [--venue-shows 200]
+#
+# Renders the real /shows, /venues and venue detail templates with synthetic
+# rows (no database needed) and compresses each page with every available
+# codec across its level range. Prints bytes, ratio and milliseconds per
+# compression as JSON, to pick COMPRESS_*_LEVEL.
+
+import argparse
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from flask import render_template
+
+from app import create_app
+from compression import CODECS, compress
+from pagination import Page
+
+LEVELS = {
+    'gzip': [1, 4, 6, 9],
+    'br': [1, 4, 6, 9, 11],
+    'zstd': [1, 3, 9, 19],
+}
+
+
+def _show(rng, i, start):
+    return {
+        'venue_id': rng.randrange(1, 50000),
+        'venue_name': f'The {rng.choice(["Musical", "Dueling", "Park"])} Hop {i}',
+        'artist_id': rng.randrange(1, 200000),
+        'artist_name': f'Guns N Petals {i}',
+        'artist_image_link': f'https://images.example.com/photo-{rng.randrange(10 ** 9)}?w=300&q=80',
+        'start_time': start + timedelta(hours=7 * i),
+    }
+
+
+def pages(app, shows, venue_shows, rng):
+    start = datetime(2026, 1, 1, 20, 0)
+    page = Page([], next_cursor='eyJhIjoxfQ', prev_cursor='eyJhIjoxfQ')
+    venue = {
+        'id': 1, 'name': 'The Musical Hop', 'genres': ['Jazz', 'Reggae', 'Swing'],
+        'address': '1015 Folsom Street', 'city': 'San Francisco', 'state': 'CA',
+        'phone': '123-123-1234', 'website': 'https://www.themusicalhop.com',
+        'facebook_link': 'https://www.facebook.com/TheMusicalHop', 'seeking_talent': True,
+        'seeking_description': 'We are on the lookout for a local artist.',
+        'image_link': 'https://images.example.com/venue.jpg',
+        'upcoming_shows': [_show(rng, i, start) for i in range(venue_shows // 2)],
+    }
+    venue['upcoming_shows_count'] = len(venue['upcoming_shows'])
+    venue['past_shows_count'] = venue_shows - len(venue['upcoming_shows'])
+    areas = [
+        {'city': f'City {c}', 'state': 'CA', 'venues': [
+            {'id': c * 10 + v, 'name': f'Venue {c}-{v}', 'num_upcoming_shows': v} for v in range(10)
+        ]}
+        for c in range(shows // 10)
+    ]
+    with app.test_request_context('/'):
+        return {
+            '/shows': render_template('pages/shows.html', shows=[_show(rng, i, start) for i in range(shows)], page=page, range_args={}),
+            '/venues': render_template('pages/venues.html', areas=areas, page=page, filters={}),
+            '/venues/<id>': render_template('pages/show_venue.html', venue=venue),
+            '/venues/<id>/past-shows': render_template(
+                'pages/past_shows.html',
+                shows=[_show(rng, i, start - timedelta(days=365)) for i in range(app.config['PAST_SHOWS_PAGE_SIZE'])],
+                tile='artist',
+                next_url='/venues/1/past-shows?after=eyJhIjoxfQ',
+            ),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shows', type=int, default=50, help='Rows on the listing pages.')
+    parser.add_argument('--venue-shows', type=int, default=200, help='Shows on the venue page.')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    report = {}
+    for name, html in pages(create_app(), args.shows, args.venue_shows, random.Random(42)).items():
+        data = html.encode('utf-8')
+        results = []
+        for encoding in CODECS:
+            for level in LEVELS[encoding]:
+                size = len(compress(data, encoding, level))
+                seconds = min(timeit.repeat(lambda: compress(data, encoding, level), number=1, repeat=args.repeat))
+                results.append({
+                    'encoding': encoding,
+                    'level': level,
+                    'bytes': size,
+                    'ratio': round(len(data) / size, 2),
+                    'ms': round(seconds * 1000, 3),
+                })
+        report[name] = {'bytes': len(data), 'codecs': results}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#----------------------------------------------------------------------------#
+# Micro-benchmark for the `datetime` Jinja filter
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.datetime_filter [--count N]
+#
+# Compares the original filter (isoformat() in the route, re-parsed and
+# re-interpreted by babel.dates.format_datetime on every call) with the
+# compiled path, cold (no compiled pattern, field memo or cached result yet)
+# and warm.
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+
+from filters import DATETIME_FORMATS, format_datetime, _compiled, _format
+
+
+def legacy_format_datetime(value, format='medium'):
+    value_str = str(value)
+    try:
+        date = datetime.fromisoformat(value_str)
+    except ValueError:
+        date = datetime.strptime(value_str, "%Y-%m-%d %H:%M:%S")
+    return babel.dates.format_datetime(date, DATETIME_FORMATS[format], locale='en')
+
+
+def per_call_us(func, count, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=5000)
+    args = parser.parse_args()
+
+    start = datetime(2026, 1, 1, 20, 0)
+    values = [start + timedelta(minutes=37 * i) for i in range(args.count)]
+    strings = [value.isoformat() for value in values]
+
+    def legacy():
+        for value in strings:
+            legacy_format_datetime(value, 'full')
+
+    def cold():
+        # Dropping the compiled patterns drops their field memos with them.
+        _format.cache_clear()
+        _compiled.cache_clear()
+        for value in values:
+            format_datetime(value, 'full')
+
+    def warm():
+        for value in values:
+            format_datetime(value, 'full')
+
+    assert [legacy_format_datetime(s, 'full') for s in strings] == [
+        format_datetime(value, 'full') for value in values
+    ]
+    warm()
+    results = {
+        'count': args.count,
+        'per_call_us': {
+            'legacy': per_call_us(legacy, args.count),
+            'compiled_cold': per_call_us(cold, args.count),
+            'compiled_warm': per_call_us(warm, args.count),
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
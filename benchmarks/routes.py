@@ -0,0 +1,212 @@
+#----------------------------------------------------------------------------#
+# Route benchmarks
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.routes [--scales 0.01,0.1,1] [--requests 50] [--output FILE]
+#
+# For each scale, seeds the database in DATABASE_URL with benchmarks.seed
+# (scale x 50k venues / 200k artists / 5M shows; this deletes existing data)
+# and times every page route through the Flask test client. Reports p50/p95
+# latency, queries per request and the process's peak RSS as JSON, so runs on
+# different commits can be diffed. --no-seed times the current data as is.
+# The page cache is off unless --with-cache is given. Queries are counted at
+# the engine until the response body has been read, so the streamed /api
+# routes are counted too. POST /shows/batch books shows from the year 2300 on,
+# which are deleted again after each run.
+
+import argparse
+import itertools
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from extensions import db
+from models import Venue, Artist, Show
+from suggest import SUGGEST_MODELS, build_index
+from benchmarks.seed import seed
+
+BASE_VOLUMES = {'venues': 50000, 'artists': 200000, 'shows': 5000000}
+BATCH_START = datetime(2300, 1, 1, 20, 0)
+
+
+def _tour(rng, venue_ids, artist_ids, weeks):
+    # Ten dates a week apart, starting after every earlier tour.
+    start = BATCH_START + timedelta(weeks=10 * next(weeks))
+    artist_id = rng.choice(artist_ids)
+    return {'shows': [
+        {
+            'artist_id': artist_id,
+            'venue_id': rng.choice(venue_ids),
+            'start_time': (start + timedelta(weeks=i)).strftime('%Y-%m-%d %H:%M'),
+        }
+        for i in range(10)
+    ]}
+
+
+def _routes(rng):
+    # Detail routes rotate through a fixed random sample of ids, so a run
+    # mixes popular and long-tail venues and artists.
+    venue_ids = [v for v, in db.session.query(Venue.id).order_by(db.func.random()).limit(20)]
+    artist_ids = [a for a, in db.session.query(Artist.id).order_by(db.func.random()).limit(20)]
+    terms = ['a', 'hall', 'jazz', 'san francisco', 'blue sound', 'zzz']
+    prefixes = ['a', 'th', 'blu', 'jaz', 'san f', 'zz']
+    weeks = itertools.count()
+    return {
+        'GET /': lambda c: c.get('/'),
+        'GET /venues': lambda c: c.get('/venues'),
+        'GET /artists': lambda c: c.get('/artists'),
+        'GET /shows': lambda c: c.get('/shows'),
+        'GET /shows?from&to': lambda c: c.get('/shows?from=2026-06-01&to=2026-06-30'),
+        'GET /venues/<id>': lambda c: c.get(f'/venues/{rng.choice(venue_ids)}'),
+        'GET /artists/<id>': lambda c: c.get(f'/artists/{rng.choice(artist_ids)}'),
+        'GET /venues/<id>/past-shows': lambda c: c.get(f'/venues/{rng.choice(venue_ids)}/past-shows'),
+        'GET /artists/<id>/past-shows': lambda c: c.get(f'/artists/{rng.choice(artist_ids)}/past-shows'),
+        'POST /venues/search': lambda c: c.post('/venues/search', data={'search_term': rng.choice(terms)}),
+        'POST /artists/search': lambda c: c.post('/artists/search', data={'search_term': rng.choice(terms)}),
+        'GET /venues/<id>/edit': lambda c: c.get(f'/venues/{rng.choice(venue_ids)}/edit'),
+        'GET /artists/<id>/edit': lambda c: c.get(f'/artists/{rng.choice(artist_ids)}/edit'),
+        'GET /venues/create': lambda c: c.get('/venues/create'),
+        'GET /artists/create': lambda c: c.get('/artists/create'),
+        'GET /shows/create': lambda c: c.get('/shows/create'),
+        'GET /shows/batch': lambda c: c.get('/shows/batch'),
+        'POST /shows/batch': lambda c: c.post('/shows/batch', json=_tour(rng, venue_ids, artist_ids, weeks)),
+        'GET /api/shows?venue_id': lambda c: c.get(f'/api/shows?venue_id={rng.choice(venue_ids)}'),
+        'GET /api/venues?q': lambda c: c.get(f'/api/venues?q={rng.choice(terms)}'),
+        'GET /api/artists?q': lambda c: c.get(f'/api/artists?q={rng.choice(terms)}'),
+        'GET /api/venues/<id>': lambda c: c.get(f'/api/venues/{rng.choice(venue_ids)}'),
+        'GET /api/artists/<id>': lambda c: c.get(f'/api/artists/{rng.choice(artist_ids)}'),
+        'GET /api/suggest': lambda c: c.get(f'/api/suggest?type=artist&q={rng.choice(prefixes)}'),
+    }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class _QueryCounter:
+    # X-SQL-Queries is set before a streamed body runs, so count at the
+    # engine instead.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def time_routes(app, requests, rng):
+    results = {}
+    with app.app_context():
+        routes = _routes(rng)
+    client = app.test_client()
+    counter = _QueryCounter()
+    event.listen(Engine, 'before_cursor_execute', counter)
+    try:
+        for name, call in routes.items():
+            results[name] = _time_route(client, call, requests, counter)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', counter)
+        with app.app_context():
+            db.session.execute(db.delete(Show).where(Show.start_time >= BATCH_START))
+            db.session.commit()
+    return results
+
+
+def _time_route(client, call, requests, counter):
+    latencies = []
+    queries = []
+    statuses = set()
+    call(client)  # warm up: template compilation, first connection
+    for _ in range(requests):
+        before = counter.count
+        start = time.perf_counter()
+        response = call(client)
+        response.get_data()  # drain streamed responses
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': _percentile(latencies, 0.50),
+        'p95_ms': _percentile(latencies, 0.95),
+        'mean_ms': statistics.fmean(latencies),
+        'queries_per_request': statistics.fmean(queries),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'statuses': sorted(statuses),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', default='0.01,0.1,1',
+                        help='Comma-separated multiples of 50k venues / 200k artists / 5M shows.')
+    parser.add_argument('--requests', type=int, default=50, help='Timed requests per route.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-seed', action='store_true', help='Benchmark the current data once.')
+    parser.add_argument('--with-cache', action='store_true',
+                        help='Leave the page cache on (detail pages are then mostly cache hits).')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+    args = parser.parse_args()
+
+    # The suggest indexes are built after each seed below, not from whatever
+    # the database held at startup.
+    app = create_app({
+        'PAGE_CACHE_ENABLED': args.with_cache,
+        'WTF_CSRF_ENABLED': False,
+        'SUGGEST_WARMUP': False,
+    })
+    rng = random.Random(args.seed)
+    report = {
+        'commit': _git_commit(),
+        'requests_per_route': args.requests,
+        'page_cache': args.with_cache,
+        'runs': [],
+    }
+    scales = [None] if args.no_seed else [float(s) for s in args.scales.split(',')]
+    for scale in scales:
+        with app.app_context():
+            if scale is not None:
+                volumes = {k: max(1, int(v * scale)) for k, v in BASE_VOLUMES.items()}
+                seed(volumes['venues'], volumes['artists'], volumes['shows'], args.seed,
+                     log=lambda message: print(message, file=sys.stderr))
+            volumes = {
+                'venues': db.session.query(db.func.count(Venue.id)).scalar(),
+                'artists': db.session.query(db.func.count(Artist.id)).scalar(),
+                'shows': db.session.query(db.func.count(Show.id)).scalar(),
+            }
+            for kind in SUGGEST_MODELS:
+                build_index(kind, app.extensions['suggest'][kind])
+            db.session.remove()
+        report['runs'].append({
+            'scale': scale,
+            'volumes': volumes,
+            'routes': time_routes(app, args.requests, rng),
+        })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#----------------------------------------------------------------------------#
+# Synthetic large-catalogue dataset
+#----------------------------------------------------------------------------#
+
+# python -m benchmarks.seed --truncate [--venues N] [--artists N] [--shows N]
+#
+# Fills the database in DATABASE_URL with a reproducible synthetic catalogue:
+# a skewed city/state distribution, 1-3 genres per venue/artist drawn from a
+# skewed genre mix, and shows concentrated on popular venues and artists,
+# spread from two years ago to one year ahead. Rows are loaded with COPY.
+# --truncate is required because every existing venue, artist and show is
+# deleted first: never point this at a database you care about.
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from extensions import db
+
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul',
+    'Other',
+]
+
+CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('Chicago', 'IL'),
+    ('Houston', 'TX'), ('Phoenix', 'AZ'), ('Philadelphia', 'PA'),
+    ('San Antonio', 'TX'), ('San Diego', 'CA'), ('Dallas', 'TX'),
+    ('San Francisco', 'CA'), ('Austin', 'TX'), ('Seattle', 'WA'),
+    ('Denver', 'CO'), ('Nashville', 'TN'), ('Portland', 'OR'),
+    ('New Orleans', 'LA'), ('Atlanta', 'GA'), ('Miami', 'FL'),
+    ('Boston', 'MA'), ('Detroit', 'MI'),
+]
+
+WORDS = [
+    'Blue', 'Velvet', 'Electric', 'Hop', 'Lounge', 'Hall', 'Sound', 'Garden',
+    'Wild', 'Sax', 'Band', 'Petals', 'Stage', 'Club', 'Live', 'Coffee',
+    'Echo', 'River', 'Neon', 'Crow', 'Union', 'Social', 'Room', 'House',
+]
+
+COPY_BATCH = 100000
+
+
+def zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def cumulative(weights):
+    total = 0.0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def _array_literal(values):
+    return '{' + ','.join(f'"{v}"' for v in values) + '}'
+
+
+def _copy(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+    )
+
+
+def _copy_batches(cursor, table, columns, rows):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, COPY_BATCH))
+        if not batch:
+            return
+        _copy(cursor, table, columns, batch)
+
+
+def _entities(rng, count, kind):
+    city_weights = cumulative(zipf_weights(len(CITIES)))
+    genre_weights = cumulative(zipf_weights(len(GENRES), 0.8))
+    for i in range(1, count + 1):
+        city, state = rng.choices(CITIES, cum_weights=city_weights)[0]
+        genres = sorted(set(rng.choices(GENRES, cum_weights=genre_weights, k=rng.randint(1, 3))))
+        name = f'{rng.choice(WORDS)} {rng.choice(WORDS)} {kind} {i}'
+        search_text = f"{name} {city}, {state} {' '.join(genres)}".lower()
+        yield i, name, city, state, _array_literal(genres), search_text
+
+
+def seed(venues, artists, shows, random_seed=42, log=print):
+    rng = random.Random(random_seed)
+    started = time.monotonic()
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute('TRUNCATE "Show", "Venue", "Artist" RESTART IDENTITY CASCADE')
+    # Recomputing counters per COPY batch would dominate the load; rebuild
+    # them once at the end instead.
+    cursor.execute('ALTER TABLE "Show" DISABLE TRIGGER USER')
+
+    venue_rows = (
+        (i, name, city, state, f'{i} Main St', genres, search_text, rng.random() < 0.3)
+        for i, name, city, state, genres, search_text in _entities(rng, venues, 'Venue')
+    )
+    _copy_batches(cursor, 'Venue', (
+        'id', 'name', 'city', 'state', 'address', 'genres', 'search_text', 'seeking_talent',
+    ), venue_rows)
+    log(f'{venues} venues loaded')
+
+    artist_rows = (
+        row + (rng.random() < 0.3,) for row in _entities(rng, artists, 'Artist')
+    )
+    _copy_batches(cursor, 'Artist', (
+        'id', 'name', 'city', 'state', 'genres', 'search_text', 'seeking_venue',
+    ), artist_rows)
+    log(f'{artists} artists loaded')
+
+    venue_weights = cumulative(zipf_weights(venues, 0.9))
+    artist_weights = cumulative(zipf_weights(artists, 0.9))
+    venue_ids = range(1, venues + 1)
+    artist_ids = range(1, artists + 1)
+    origin = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=730)
+    slots = 3 * 365 * 48  # half-hour slots across three years
+    # One partition per month of the range, so no show lands in "Show_default".
+    cursor.execute(
+        'SELECT create_show_partitions(%s, %s)',
+        (origin, origin + timedelta(minutes=30 * slots)),
+    )
+    for start in range(0, shows, COPY_BATCH):
+        size = min(COPY_BATCH, shows - start)
+        batch = zip(
+            rng.choices(venue_ids, cum_weights=venue_weights, k=size),
+            rng.choices(artist_ids, cum_weights=artist_weights, k=size),
+            (origin + timedelta(minutes=30 * rng.randrange(slots)) for _ in range(size)),
+        )
+        _copy(cursor, 'Show', ('venue_id', 'artist_id', 'start_time'), batch)
+        log(f'{start + size} shows loaded')
+
+    for table in ('Venue', 'Artist', 'Show'):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'(SELECT coalesce(max(id), 1) FROM "{table}"))'
+        )
+    cursor.execute('ALTER TABLE "Show" ENABLE TRIGGER USER')
+    cursor.execute(
+        'SELECT refresh_show_counters('
+        'ARRAY(SELECT id FROM "Venue"), ARRAY(SELECT id FROM "Artist"))'
+    )
+    cursor.close()
+    db.session.commit()
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').exec_driver_sql('ANALYZE')
+    log(f'Seeded in {time.monotonic() - started:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--venues', type=int, default=50000)
+    parser.add_argument('--artists', type=int, default=200000)
+    parser.add_argument('--shows', type=int, default=5000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--truncate', action='store_true',
+                        help='Required: confirms every existing row may be deleted.')
+    args = parser.parse_args()
+    if not args.truncate:
+        parser.error('--truncate is required; seeding deletes all venues, artists and shows.')
+    with create_app().app_context():
+        seed(args.venues, args.artists, args.shows, args.seed)
+    print(json.dumps(vars(args)))
+
+
+if __name__ == '__main__':
+    main()
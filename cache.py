@@ -0,0 +1,212 @@
+#----------------------------------------------------------------------------#
+# Page cache
+#----------------------------------------------------------------------------#
+
+# Rendered venue and artist detail pages, keyed by entity id. Writes that
+# change a page invalidate it explicitly; entries also expire when the
+# entity's next show starts, so the upcoming/past split never goes stale.
+#
+# The in-process LRU is per worker: with several workers, use the shared
+# backend so an invalidation reaches all of them. Each entry is stored with
+# the ETag the view had when it was rendered (g.validator, set by
+# @conditional) and is only served while the current ETag still matches, so a
+# write no invalidation saw (raw SQL, `flask import` against the LRU or local
+# backends, whose clear() only reaches the CLI's own process) never pairs a
+# new ETag with an old body.
+
+import fnmatch
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    import redis
+except ImportError:  # optional: only needed for PAGE_CACHE_BACKEND = 'redis'
+    redis = None
+
+from flask import current_app, g, render_template, session
+
+
+class LRUCache:
+    def __init__(self, max_entries, default_ttl):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalClient:
+    # Stand-in for a redis client (get / set with ex / delete / scan_iter /
+    # unlink), for running the shared backend without a server.
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        expires_at = time.monotonic() + ex if ex is not None else None
+        with self._lock:
+            self._entries[name] = (value, expires_at)
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._entries.pop(name, None)
+
+    def scan_iter(self, match='*', count=None):
+        with self._lock:
+            names = [name for name in self._entries if fnmatch.fnmatchcase(name, match)]
+        return iter(names)
+
+    unlink = delete
+
+
+CLEAR_BATCH_SIZE = 500
+
+
+class SharedCache:
+    def __init__(self, client, default_ttl, prefix='fyyur:page:'):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        # Only our own keys: the redis database may hold sessions and other
+        # apps' keys too. SCAN walks the keyspace without blocking the server.
+        names = self.client.scan_iter(match=self.prefix + '*', count=CLEAR_BATCH_SIZE)
+        while True:
+            batch = list(itertools.islice(names, CLEAR_BATCH_SIZE))
+            if not batch:
+                break
+            self.client.unlink(*batch)
+
+
+def build_cache(config):
+    backend = config['PAGE_CACHE_BACKEND']
+    ttl = config['PAGE_CACHE_TTL']
+    if backend == 'lru':
+        return LRUCache(config['PAGE_CACHE_MAX_ENTRIES'], ttl)
+    if backend == 'local':
+        return SharedCache(LocalClient(), ttl)
+    if backend == 'redis':
+        if redis is None:
+            raise RuntimeError("PAGE_CACHE_BACKEND = 'redis' needs the redis package installed.")
+        return SharedCache(redis.Redis.from_url(config['PAGE_CACHE_REDIS_URL']), ttl)
+    raise RuntimeError(f'Unknown PAGE_CACHE_BACKEND {backend!r}.')
+
+
+def init_app(app):
+    app.extensions['page_cache'] = build_cache(app.config)
+
+
+def page_cache():
+    return current_app.extensions['page_cache']
+
+
+def venue_key(venue_id):
+    return f'venue:{venue_id}'
+
+
+def artist_key(artist_id):
+    return f'artist:{artist_id}'
+
+
+def _cacheable():
+    # A page rendered with pending flash messages must not be served from (or
+    # written to) the cache, or the message would be lost or repeated. The
+    # layout pops them while rendering, so ask before rendering.
+    return current_app.config['PAGE_CACHE_ENABLED'] and not session.get('_flashes')
+
+
+def _current_etag():
+    validator = g.get('validator')
+    return validator.etag if validator is not None else ''
+
+
+def get_page(key):
+    if not _cacheable():
+        return None
+    entry = page_cache().get(key)
+    if entry is None:
+        return None
+    etag, _, html = entry.partition('\n')
+    return html if etag == _current_etag() else None
+
+
+def set_page(key, html, next_show_at=None):
+    ttl = current_app.config['PAGE_CACHE_TTL']
+    if next_show_at is not None:
+        until_next_show = (next_show_at - datetime.utcnow()).total_seconds()
+        ttl = min(ttl, until_next_show)
+    if ttl > 0:
+        page_cache().set(key, f'{_current_etag()}\n{html}', ttl)
+
+
+def render_page(key, template, next_show_at=None, **context):
+    # render_template() plus set_page(), unless the page carries flashes.
+    cacheable = _cacheable()
+    html = render_template(template, **context)
+    if cacheable:
+        set_page(key, html, next_show_at)
+    return html
+
+
+def invalidate(venue_ids=(), artist_ids=()):
+    keys = [venue_key(venue_id) for venue_id in venue_ids]
+    keys += [artist_key(artist_id) for artist_id in artist_ids]
+    page_cache().delete(*keys)
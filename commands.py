@@ -0,0 +1,426 @@
+#----------------------------------------------------------------------------#
+# CLI commands
+#----------------------------------------------------------------------------#
+
+import csv
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from assets import build_assets
+from cache import page_cache
+from counters import counter_drift, rebuild_show_counters, sweep_show_counters
+from exporter import EXPORTS, FORMATS, export_chunks, export_statement, gzip_chunks, stream_rows
+from extensions import db
+from importer import ENTITY_SPECS, import_file
+from models import Venue, Artist, Show
+from partitions import ensure_show_partitions, show_partitions
+from queries import (
+    venue_listing_query,
+    artist_listing_query,
+    venue_search_query,
+    artist_search_query,
+    venue_shows_query,
+    artist_shows_query,
+    venue_shows_statement,
+    artist_shows_statement,
+    show_listing_query,
+)
+from soft_delete import SOFT_DELETE_MODELS, live_only, purge_deleted
+from templating import compile_templates
+
+
+def _scans(plan, table):
+    # Walk an EXPLAIN (FORMAT JSON) plan tree and collect the scans of
+    # `table` or of its partitions ("Show_2026_10", "Show_default").
+    found = []
+    relation = plan.get('Relation Name') or ''
+    if relation == table or relation.startswith(f'{table}_'):
+        found.append(plan)
+    for child in plan.get('Plans', []):
+        found.extend(_scans(child, table))
+    return found
+
+
+def _scan_indexes(scan):
+    # The index a scan reads through, or its node type when it uses none.
+    if 'Index Name' in scan:
+        return [scan['Index Name']]
+    if scan['Node Type'] == 'Bitmap Heap Scan':
+        found = []
+        pending = list(scan.get('Plans', []))
+        while pending:
+            node = pending.pop()
+            if 'Index Name' in node:
+                found.append(node['Index Name'])
+            pending.extend(node.get('Plans', []))
+        return found
+    return [scan['Node Type']]
+
+
+# Each partition of "Show" has its own copy of every index; name them by the
+# index they were created from.
+PARENT_INDEXES = '''
+SELECT child.relname, parent.relname
+FROM pg_inherits
+JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+WHERE child.relkind = 'i'
+'''
+
+
+def _explain(query):
+    # live_only() adds the soft-delete filter the session would.
+    statement = getattr(query, 'statement', query)
+    statement = live_only(statement).compile(dialect=db.engine.dialect)
+    result = db.session.connection().exec_driver_sql(
+        'EXPLAIN (FORMAT JSON) ' + str(statement), statement.params
+    )
+    return result.scalar()[0]['Plan']
+
+
+def _first_page(query, *columns):
+    # The first page keyset_page() fetches for a listing.
+    return query.order_by(*columns).limit(current_app.config['PAGE_SIZE'] + 1)
+
+
+def _past_shows_page(query, now):
+    # The first page of venue_past_shows / artist_past_shows.
+    return (
+        query.filter(Show.start_time <= now)
+        .order_by(Show.start_time.desc(), Show.id.desc())
+        .limit(current_app.config['PAST_SHOWS_PAGE_SIZE'] + 1)
+    )
+
+
+def plan_checks():
+    # name: (query, table, the indexes it should read that table through).
+    # The seed gives the lowest ids the most shows; a typical page is one
+    # from the long tail.
+    venue_id = db.session.query(db.func.max(Venue.id)).scalar() or 1
+    artist_id = db.session.query(db.func.max(Artist.id)).scalar() or 1
+    now = datetime.utcnow()
+    search_limit = current_app.config['SEARCH_RESULTS_LIMIT']
+    return {
+        'venues': (
+            _first_page(venue_listing_query(), Venue.state, Venue.city, Venue.id),
+            'Venue', {'ix_Venue_state_city_id'},
+        ),
+        'artists': (_first_page(artist_listing_query(), Artist.id), 'Artist', {'Artist_pkey'}),
+        # pg_trgm can only use its index for terms of three characters or
+        # more, and a term most rows match is cheaper to find by scanning.
+        'search_venues': (
+            venue_search_query('4321').limit(search_limit), 'Venue', {'ix_Venue_search_text_trgm'},
+        ),
+        'search_artists': (
+            artist_search_query('4321').limit(search_limit), 'Artist', {'ix_Artist_search_text_trgm'},
+        ),
+        'show_venue': (
+            venue_shows_statement(venue_id, True, now), 'Show', {'ix_Show_venue_id_start_time_id'},
+        ),
+        'show_artist': (
+            artist_shows_statement(artist_id, True, now), 'Show', {'ix_Show_artist_id_start_time_id'},
+        ),
+        'venue_past_shows': (
+            _past_shows_page(venue_shows_query(venue_id), now),
+            'Show', {'ix_Show_venue_id_start_time_id'},
+        ),
+        'artist_past_shows': (
+            _past_shows_page(artist_shows_query(artist_id), now),
+            'Show', {'ix_Show_artist_id_start_time_id'},
+        ),
+        'shows': (_first_page(show_listing_query(), Show.start_time, Show.id), 'Show', {'ix_Show_start_time_id'}),
+        # A common genre may be cheaper to find by walking the listing order.
+        'venues_by_genre': (
+            _first_page(venue_listing_query(genre='Jazz'), Venue.state, Venue.city, Venue.id),
+            'Venue', {'ix_Venue_genres', 'ix_Venue_state_city_id'},
+        ),
+        'artists_by_genre': (
+            _first_page(artist_listing_query(genre='Rock n Roll'), Artist.id),
+            'Artist', {'ix_Artist_genres', 'Artist_pkey'},
+        ),
+    }
+
+
+def run_plan_checks(echo=print):
+    # Returns the number of failed checks. Run it against a seeded database:
+    # on a near-empty table every plan is a sequential scan.
+    parents = dict(db.session.execute(db.text(PARENT_INDEXES)).all())
+    failures = 0
+    for name, (query, table, expected) in plan_checks().items():
+        # "Show_default" stays empty while `flask shows partitions` runs, and
+        # an empty table is rightly read by a sequential scan.
+        used = {
+            parents.get(index, index)
+            for scan in _scans(_explain(query), table)
+            if scan['Relation Name'] != 'Show_default'
+            for index in _scan_indexes(scan)
+        }
+        if used and used <= expected:
+            echo(f'ok   {name} ({", ".join(sorted(used))})')
+        else:
+            failures += 1
+            echo(f'FAIL {name}: reads "{table}" through {", ".join(sorted(used)) or "nothing"}, '
+                 f'expected {" or ".join(sorted(expected))}')
+    # A one-month /shows?from=&to= range should only touch that month's
+    # partition (and "Show_default").
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    query = show_listing_query(start=month, end=(month + timedelta(days=32)).replace(day=1))
+    partitions = {scan['Relation Name'] for scan in _scans(_explain(query), 'Show')}
+    if len(partitions) > 2:
+        failures += 1
+        echo(f'FAIL shows_range: scans {len(partitions)} partitions of "Show"')
+    else:
+        echo(f'ok   shows_range ({", ".join(sorted(partitions))})')
+    db.session.rollback()
+    return failures
+
+
+@click.command('check-plans')
+@with_appcontext
+def check_plans():
+    """Fail if a route query doesn't read its table through the intended index."""
+    if run_plan_checks(click.echo):
+        sys.exit(1)
+
+
+counters_cli = AppGroup('counters', help='Maintain the denormalized show counters.')
+
+
+@counters_cli.command('sweep')
+def sweep_counters():
+    """Move shows that have started from upcoming to past."""
+    venues, artists = sweep_show_counters()
+    db.session.commit()
+    click.echo(f'Refreshed {venues} venues and {artists} artists.')
+
+
+@counters_cli.command('rebuild')
+def rebuild_counters():
+    """Report counter drift, then recompute every counter from "Show"."""
+    venues, artists = counter_drift()
+    click.echo(f'{venues} venues and {artists} artists had stale counters.')
+    rebuild_show_counters()
+    db.session.commit()
+    click.echo('Counters rebuilt.')
+
+
+shows_cli = AppGroup('shows', help='Maintain the "Show" table.')
+
+
+@shows_cli.command('partitions')
+@click.option('--months-ahead', type=int, help='Default: SHOW_PARTITION_MONTHS_AHEAD.')
+@click.option('--list', 'list_partitions', is_flag=True, help='Print every partition afterwards.')
+def partitions_command(months_ahead, list_partitions):
+    """Create the monthly "Show" partitions through the coming months."""
+    if months_ahead is None:
+        months_ahead = current_app.config['SHOW_PARTITION_MONTHS_AHEAD']
+    created = ensure_show_partitions(months_ahead)
+    db.session.commit()
+    click.echo(f'Created {created} partitions ({months_ahead} months ahead).')
+    if list_partitions:
+        for name, bounds, rows in show_partitions():
+            click.echo(f'{name}: {bounds} (~{max(rows, 0)} rows)')
+
+
+@click.command('purge-deleted')
+@click.option('--older-than-days', type=int, help='Default: SOFT_DELETE_RETENTION_DAYS.')
+@click.option('--batch-size', type=int, help='Default: PURGE_BATCH_SIZE.')
+@with_appcontext
+def purge_deleted_command(older_than_days, batch_size):
+    """Remove soft-deleted venues and artists, and their shows, in batches."""
+    if older_than_days is None:
+        older_than_days = current_app.config['SOFT_DELETE_RETENTION_DAYS']
+    if batch_size is None:
+        batch_size = current_app.config['PURGE_BATCH_SIZE']
+    before = datetime.utcnow() - timedelta(days=older_than_days)
+
+    def progress(model, count):
+        click.echo(f'Removed {count} rows from "{model.__tablename__}".')
+
+    for model in SOFT_DELETE_MODELS:
+        shows, rows = purge_deleted(model, before, batch_size, on_batch=progress)
+        click.echo(f'Purged {rows} {model.__tablename__.lower()}s and their {shows} shows.')
+    page_cache().clear()  # as in `flask import`
+
+
+assets_cli = AppGroup('assets', help='Build the static asset bundles.')
+
+
+@assets_cli.command('build')
+def build_assets_command():
+    """Write minified, fingerprinted bundles and their manifest to static/dist."""
+    manifest, sizes = build_assets(current_app)
+    for name, filename in manifest.items():
+        click.echo(f'{name} -> dist/{filename} ({sizes[name]} bytes, +.gz)')
+
+
+templates_cli = AppGroup('templates', help='Manage the compiled template cache.')
+
+
+@templates_cli.command('compile')
+@click.option('--clear', is_flag=True, help='Empty the bytecode cache first.')
+def compile_templates_command(clear):
+    """Compile every template into the bytecode cache (TEMPLATE_CACHE_DIR)."""
+    cache = current_app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set.')
+    if clear:
+        cache.clear()
+    current_app.jinja_env.cache.clear()  # the startup warm-up has already loaded them
+    started = time.perf_counter()
+    names = compile_templates(current_app)
+    click.echo(f'Compiled {len(names)} templates in {(time.perf_counter() - started) * 1000:.0f}ms.')
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(ENTITY_SPECS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=10000, show_default=True)
+@click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False),
+              help='Write every rejected line and its reason to this CSV file.')
+@with_appcontext
+def import_data(kind, path, batch_size, rejects_path):
+    """Bulk load venues, artists or shows from a CSV or NDJSON file.
+
+    Import venues and artists before the shows that refer to them.
+    """
+    def progress(stats):
+        click.echo(
+            f'{stats.read} rows read, {stats.inserted} inserted, '
+            f'{stats.updated} updated, {len(stats.rejects)} rejected '
+            f'({stats.rows_per_second:.0f} rows/s)'
+        )
+
+    stats = import_file(kind, path, batch_size, on_batch=progress)
+    # Only empties a shared (redis) cache; web workers' LRU/local entries
+    # stop matching the pages' ETags instead (see cache.py).
+    page_cache().clear()
+    click.echo(
+        f'Done in {stats.elapsed:.1f}s: {stats.inserted} inserted, '
+        f'{stats.updated} updated, {len(stats.rejects)} rejected '
+        f'({stats.rows_per_second:.0f} rows/s).'
+    )
+    for line, reason in stats.rejects[:20]:
+        click.echo(f'line {line}: {reason}', err=True)
+    if len(stats.rejects) > 20:
+        click.echo(f'... and {len(stats.rejects) - 20} more.', err=True)
+    if rejects_path:
+        with open(rejects_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'reason'])
+            writer.writerows(stats.rejects)
+
+
+@click.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'format', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']),
+              help='Only rows changed after this UTC timestamp.')
+@click.option('--gzip', is_flag=True, help='Compress the output with gzip.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default='-',
+              help='Output file (default: stdout).')
+@click.option('--chunk-rows', type=int,
+              help='Split the output into files of this many rows, each with a header.')
+@with_appcontext
+def export_data(kind, format, since, gzip, output, chunk_rows):
+    """Stream venues, artists or shows to CSV or NDJSON."""
+    if chunk_rows:
+        if output == '-':
+            raise click.UsageError('--chunk-rows needs --output.')
+        rows = stream_rows(export_statement(kind, since))
+        path = Path(output)
+        for number in itertools.count(1):
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+            chunks = FORMATS[format](iter(chunk))
+            data = gzip_chunks(chunks) if gzip else (c.encode('utf-8') for c in chunks)
+            name = path.with_name(f'{path.stem}-{number:04d}{path.suffix}')
+            with open(name, 'wb') as f:
+                f.writelines(data)
+            click.echo(f'Wrote {len(chunk)} rows to {name}', err=True)
+        return
+    with click.open_file(output, 'wb') as f:
+        for data in export_chunks(kind, format, since, gzip):
+            f.write(data)
+
+
+# Run in a fresh interpreter so nothing is already imported; -X importtime
+# writes one line per module to stderr. Migrate is only set up for CLI
+# commands, so this measures what a web worker pays.
+_STARTUP_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(f'create_app {(time.perf_counter() - started) * 1e6:.0f}', file=sys.stderr)
+"""
+
+
+def _parse_importtime(stderr):
+    modules = []
+    total = None
+    for line in stderr.splitlines():
+        if line.startswith('create_app '):
+            total = int(line.split()[1])
+        elif line.startswith('import time:') and '|' in line:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            if self_us.strip().isdigit():
+                modules.append({
+                    'module': name.strip(),
+                    'self_us': int(self_us),
+                    'cumulative_us': int(cumulative_us),
+                })
+    return modules, total
+
+
+@click.command('startup-profile')
+@click.option('--top', default=20, show_default=True, help='How many modules to list.')
+@click.option('--sort', type=click.Choice(['self', 'cumulative']), default='cumulative', show_default=True)
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+def startup_profile(top, sort, as_json):
+    """Report the slowest imports behind create_app() and the total startup time."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _STARTUP_SCRIPT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    modules, total = _parse_importtime(result.stderr)
+    if result.returncode != 0 or total is None:
+        raise click.ClickException('create_app() failed:\n' + result.stderr.strip())
+    modules.sort(key=lambda module: module[f'{sort}_us'], reverse=True)
+    if as_json:
+        click.echo(json.dumps({'create_app_us': total, 'modules': modules[:top]}, indent=2))
+        return
+    click.echo(f'create_app() took {total / 1000:.0f}ms ({len(modules)} modules imported).')
+    click.echo(f'{"self ms":>9} {"cumul ms":>9}  module')
+    for module in modules[:top]:
+        click.echo(
+            f'{module["self_us"] / 1000:9.1f} {module["cumulative_us"] / 1000:9.1f}  {module["module"]}'
+        )
+
+
+def init_app(app):
+    for command in (
+        check_plans,
+        counters_cli,
+        shows_cli,
+        purge_deleted_command,
+        assets_cli,
+        templates_cli,
+        import_data,
+        export_data,
+        startup_profile,
+    ):
+        app.cli.add_command(command)
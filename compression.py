@@ -0,0 +1,95 @@
+#----------------------------------------------------------------------------#
+# Response compression
+#----------------------------------------------------------------------------#
+
+# Compresses rendered HTML and JSON in after_request, choosing br, zstd or
+# gzip from Accept-Encoding (brotli and zstd only when the brotli/zstandard
+# packages are installed). Skips bodies under COMPRESS_MIN_SIZE, responses that
+# are already encoded, streamed or sent from a file, and anything marked
+# no-transform. A compressed body is a different representation, so a strong
+# ETag is downgraded to a weak one; If-None-Match compares weakly, so 304s
+# from conditional.py keep working.
+
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional: enables Content-Encoding: br
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: enables Content-Encoding: zstd
+    zstandard = None
+
+
+def _gzip(data, level):
+    return gzip.compress(data, level, mtime=0)
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# Preferred first when the client rates them equally.
+CODECS = {}
+if brotli is not None:
+    CODECS['br'] = (_brotli, 'COMPRESS_BROTLI_LEVEL')
+if zstandard is not None:
+    CODECS['zstd'] = (_zstd, 'COMPRESS_ZSTD_LEVEL')
+CODECS['gzip'] = (_gzip, 'COMPRESS_GZIP_LEVEL')
+
+
+def compress(data, encoding, level):
+    return CODECS[encoding][0](data, level)
+
+
+def negotiate():
+    return request.accept_encodings.best_match(
+        [encoding for encoding in CODECS if encoding in current_app.config['COMPRESS_ALGORITHMS']]
+    )
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    if not current_app.config['COMPRESS_ENABLED'] or response.mimetype not in current_app.config['COMPRESS_MIMETYPES']:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206)
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.cache_control.no_transform
+    ):
+        return response
+    encoding = negotiate()
+    if encoding is None:
+        return response
+    if response.status_code == 304:
+        # Carry the same validator the compressed 200 had.
+        _weaken_etag(response)
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.set_data(compress(data, encoding, current_app.config[CODECS[encoding][1]]))
+    response.content_encoding = encoding
+    _weaken_etag(response)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,163 @@
+#----------------------------------------------------------------------------#
+# Conditional GET
+#----------------------------------------------------------------------------#
+
+# @conditional(validator) gives a view a strong ETag and Last-Modified taken
+# from one aggregate query over the updated_at columns (plus table_deletions,
+# which records the last delete on each table), and answers a matching
+# If-None-Match / If-Modified-Since with 304 before the view runs. The ETag
+# also covers the templates and asset manifest, so a deploy that changes a
+# page changes its tag.
+# Cache-Control comes from HTTP_CACHE_CONTROL[endpoint], falling back to
+# HTTP_CACHE_CONTROL_DEFAULT. The validator is kept in g.validator, and the
+# page cache stores it with each page it caches (see cache.py).
+
+import functools
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import current_app, g, make_response, request, session
+
+from assets import manifest_path
+from extensions import db
+from models import Venue, Artist, Show
+
+
+@functools.lru_cache(maxsize=None)
+def _fingerprint(template_root, manifest):
+    # The templates and the asset manifest they link to. Hashed on the first
+    # conditional request rather than at import, then kept for the process.
+    digest = hashlib.sha256()
+    for path in sorted(template_root.rglob('*.html')):
+        digest.update(str(path.relative_to(template_root)).encode())
+        digest.update(path.read_bytes())
+    if manifest.is_file():
+        digest.update(manifest.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def templates_fingerprint():
+    return _fingerprint(
+        Path(current_app.root_path, current_app.template_folder),
+        manifest_path(current_app),
+    )
+
+
+class Validator:
+    def __init__(self, last_modified, *parts):
+        self.last_modified = last_modified.replace(tzinfo=timezone.utc)
+        digest = hashlib.sha256(templates_fingerprint().encode())
+        for part in (last_modified, *parts):
+            digest.update(repr(part).encode())
+        self.etag = digest.hexdigest()[:32]
+
+
+def _last_deleted(*tables):
+    return (
+        db.select(db.func.max(db.column('deleted_at')))
+        .select_from(db.table('table_deletions'))
+        .where(db.column('table_name').in_(tables))
+        .scalar_subquery()
+    )
+
+
+def listing_validator(*models):
+    # The newest insert, update or delete across the tables a listing reads;
+    # each max(updated_at) is a single probe of its index.
+    newest = [db.select(db.func.max(model.updated_at)).scalar_subquery() for model in models]
+    newest.append(_last_deleted(*(model.__tablename__ for model in models)))
+    # Soft-deleted rows count: deleting one bumps its updated_at.
+    last_modified = db.session.execute(
+        db.select(db.func.greatest(*newest)).execution_options(include_deleted=True)
+    ).scalar()
+    return Validator(last_modified or datetime(1970, 1, 1))
+
+
+def _detail_validator(model, fk_column, other, other_fk_column, entity_id):
+    # A detail page changes when the entity, one of its shows or the other
+    # side of a show changes, when a show is deleted (count), and when a show
+    # starts and moves from upcoming to past (the newest started show).
+    now = datetime.utcnow()
+    row = db.session.execute(
+        db.select(
+            model.updated_at,
+            db.func.max(Show.updated_at),
+            db.func.max(other.updated_at),
+            db.func.max(Show.start_time).filter(Show.start_time <= now),
+            db.func.count(Show.id),
+        )
+        .select_from(model)
+        .outerjoin(Show, fk_column == model.id)
+        .outerjoin(other, other_fk_column == other.id)
+        .where(model.id == entity_id, model.deleted_at.is_(None))
+        .group_by(model.id)
+        # A soft-deleted `other` still changes the page: its shows disappear.
+        .execution_options(include_deleted=True)
+    ).one_or_none()
+    if row is None:
+        return None
+    return Validator(max(value for value in row[:4] if value is not None), row[4])
+
+
+def venue_validator(venue_id):
+    return _detail_validator(Venue, Show.venue_id, Artist, Show.artist_id, venue_id)
+
+
+def artist_validator(artist_id):
+    return _detail_validator(Artist, Show.artist_id, Venue, Show.venue_id, artist_id)
+
+
+def _cache_control():
+    return current_app.config['HTTP_CACHE_CONTROL'].get(
+        request.endpoint, current_app.config['HTTP_CACHE_CONTROL_DEFAULT']
+    )
+
+
+def _validate(validator, view_args):
+    # None means "render as usual": not a GET, a page carrying flash
+    # messages, or an entity the view will 404 on.
+    if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+        return None
+    return validator(**view_args)
+
+
+def _finish(response, current):
+    response = make_response(response)
+    if current is not None and response.status_code == 200:
+        response.set_etag(current.etag)
+        response.last_modified = current.last_modified
+        response.headers['Cache-Control'] = _cache_control()
+    return response
+
+
+def _not_modified(current):
+    if current is None or not (request.if_none_match or request.if_modified_since):
+        return None
+    response = _finish(current_app.response_class(), current)
+    response.make_conditional(request)
+    return response if response.status_code == 304 else None
+
+
+def conditional(validator):
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(**view_args):
+                current = g.validator = _validate(validator, view_args)
+                not_modified = _not_modified(current)
+                if not_modified is not None:
+                    return not_modified
+                return _finish(await view(**view_args), current)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            current = g.validator = _validate(validator, view_args)
+            not_modified = _not_modified(current)
+            if not_modified is not None:
+                return not_modified
+            return _finish(view(**view_args), current)
+        return wrapper
+    return decorator
@@ -1,13 +1,11 @@
 import os
-from pathlib import Path
-from dotenv import load_dotenv
 
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-load_dotenv(Path(basedir) / ".env")
-
-SECRET_KEY = os.environ.get("SECRET_KEY", os.urandom(32))
+# Read when create_app() loads this module, after it has loaded .env. Without
+# a SECRET_KEY, create_app() generates one per process (development only).
+SECRET_KEY = os.environ.get("SECRET_KEY")
 
 # Enable debug mode.
 DEBUG = True
@@ -16,9 +14,117 @@ DEBUG = True
 
 
 SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
-if not SQLALCHEMY_DATABASE_URI:
-    raise RuntimeError(
-        "DATABASE_URL is not set. Add it to a .env file or export it in your shell."
-    )
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool (see pooling.engine_options). DB_PGBOUNCER=1 when connecting
+# through PgBouncer in transaction-pooling mode.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "0") == "1"
+
+# Read replicas (see replicas.py): a comma-separated list of database URLs,
+# bound as replica_0, replica_1, ... by create_app().
+# DB_REPLICA_SELECTION is 'round_robin' or 'least_connections'.
+DB_REPLICA_URLS = [url for url in os.environ.get("DB_REPLICA_URLS", "").split(",") if url]
+DB_REPLICA_SELECTION = os.environ.get("DB_REPLICA_SELECTION", "round_robin")
+DB_READ_YOUR_WRITES_SECONDS = float(os.environ.get("DB_READ_YOUR_WRITES_SECONDS", 5))
+
+# Serve /venues/<id> and /artists/<id> from async views that run their
+# queries concurrently (see async_db.py; needs asyncpg and flask[async]).
+DB_ASYNC_DETAIL_PAGES = os.environ.get("DB_ASYNC_DETAIL_PAGES", "0") == "1"
+
+# Serve live pool statistics as JSON at /metrics/pool.
+POOL_METRICS_ENABLED = os.environ.get("POOL_METRICS_ENABLED", "0") == "1"
+
+# Per-request SQL instrumentation (see instrumentation.py)
+SQL_INSTRUMENTATION = True
+SQL_WARN_QUERY_COUNT = 20
+SQL_WARN_TIME_MS = 250
+SQL_N_PLUS_ONE_THRESHOLD = 5
+SQL_SLOWEST_STATEMENTS = 3
+SQL_TIMING_HEADERS = os.environ.get("SQL_TIMING_HEADERS", "0") == "1"
+SQL_RAISE_ON_LAZY_LOAD = os.environ.get("SQL_RAISE_ON_LAZY_LOAD", "0") == "1"
+
+# Listings
+PAGE_SIZE = 50
+
+# Past shows on a venue or artist page are fetched this many at a time as
+# the visitor scrolls (/venues/<id>/past-shows, /artists/<id>/past-shows).
+PAST_SHOWS_PAGE_SIZE = 12
+
+# Rows fetched per round trip by the streaming /api endpoints.
+API_YIELD_PER = 1000
+
+# Bearer token for /api/export/<kind>; the endpoint is off while unset.
+EXPORT_API_TOKEN = os.environ.get("EXPORT_API_TOKEN")
+
+# Conditional GET (see conditional.py): Cache-Control per endpoint, e.g.
+# {"venues.venues": "public, max-age=30"}. "no-cache" lets proxies store a page but
+# revalidate it (a cheap 304) on every request.
+HTTP_CACHE_CONTROL_DEFAULT = "public, no-cache"
+HTTP_CACHE_CONTROL = {}
+
+# Response compression (see compression.py). br and zstd need the brotli and
+# zstandard packages; levels trade CPU for bytes (python -m benchmarks.compression).
+COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1") == "1"
+COMPRESS_ALGORITHMS = ("br", "zstd", "gzip")
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_LEVEL = int(os.environ.get("COMPRESS_BROTLI_LEVEL", 4))
+COMPRESS_ZSTD_LEVEL = int(os.environ.get("COMPRESS_ZSTD_LEVEL", 3))
+COMPRESS_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+}
+
+# Compiled template cache and startup warm-up (see templating.py). An empty
+# TEMPLATE_CACHE_DIR disables the bytecode cache.
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR", os.path.join(basedir, ".jinja_cache"))
+TEMPLATE_WARMUP = os.environ.get("TEMPLATE_WARMUP", "1") == "1"
+
+# Show scheduling (see scheduling.py): a venue can't have two shows starting
+# within SHOW_BOOKING_WINDOW_MINUTES of each other, and /shows/batch takes at
+# most SHOW_BATCH_MAX_ROWS rows per request.
+SHOW_BOOKING_WINDOW_MINUTES = int(os.environ.get("SHOW_BOOKING_WINDOW_MINUTES", "180"))
+SHOW_BATCH_MAX_ROWS = 500
+
+# "Show" is partitioned by month (see partitions.py); `flask shows partitions`
+# keeps this many months ahead of today.
+SHOW_PARTITION_MONTHS_AHEAD = int(os.environ.get("SHOW_PARTITION_MONTHS_AHEAD", "12"))
+
+# Deleting a venue or artist: with SOFT_DELETE it is hidden at once (see
+# soft_delete.py) and `flask purge-deleted` removes it and its shows once
+# SOFT_DELETE_RETENTION_DAYS have passed, PURGE_BATCH_SIZE rows per
+# transaction. Without it the row and its shows are deleted straight away.
+SOFT_DELETE = os.environ.get("SOFT_DELETE", "0") == "1"
+SOFT_DELETE_RETENTION_DAYS = int(os.environ.get("SOFT_DELETE_RETENTION_DAYS", "30"))
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "1000"))
+
+# Search
+SEARCH_RESULTS_LIMIT = 50
+
+# Typeahead for the new-show form (see suggest.py). Each worker holds its own
+# index, rebuilt once it is older than SUGGEST_REFRESH_SECONDS; a build over
+# SUGGEST_MEMORY_BUDGET_MB is logged as a warning.
+SUGGEST_WARMUP = os.environ.get("SUGGEST_WARMUP", "1") == "1"
+SUGGEST_REFRESH_SECONDS = int(os.environ.get("SUGGEST_REFRESH_SECONDS", "300"))
+SUGGEST_MAX_RESULTS = 20
+SUGGEST_MEMORY_BUDGET_MB = int(os.environ.get("SUGGEST_MEMORY_BUDGET_MB", "128"))
+
+# Page cache for the venue and artist detail pages.
+# PAGE_CACHE_BACKEND: 'lru' (in-process, per worker), 'redis' (shared between
+# workers, needs the redis package) or 'local' (in-process stand-in for redis).
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_BACKEND = os.environ.get("PAGE_CACHE_BACKEND", "lru")
+PAGE_CACHE_REDIS_URL = os.environ.get("PAGE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+PAGE_CACHE_MAX_ENTRIES = 1024
+PAGE_CACHE_TTL = 300
@@ -0,0 +1,89 @@
+#----------------------------------------------------------------------------#
+# Show counters
+#----------------------------------------------------------------------------#
+
+# Venue/Artist.upcoming_shows_count and past_shows_count are kept current on
+# write by the triggers on "Show" (see migration e4a91c6d2b80), which call the
+# refresh_show_counters() SQL function. Time moving on is the one change no
+# write sees, so sweep_show_counters() has to run periodically (e.g. from cron).
+# Shows whose venue or artist is soft-deleted are not counted on the other
+# side (migration c3e5a7b9d1f0).
+
+from extensions import db
+from models import Venue, Artist, Show
+
+
+def _utc_now():
+    # Same clock as refresh_show_counters(), so sweeps agree with the triggers.
+    return db.func.timezone('utc', db.func.now())
+
+
+def _refresh(venue_ids, artist_ids):
+    db.session.execute(
+        db.select(db.func.refresh_show_counters(
+            db.func.array(venue_ids.scalar_subquery()),
+            db.func.array(artist_ids.scalar_subquery()),
+        ))
+    )
+
+
+def past_shows_count(entity, upcoming):
+    # The past count for a detail page that has just listed its `upcoming`
+    # shows. The total is exact between sweeps; the split isn't, since a
+    # show that has started stays "upcoming" until the next sweep.
+    return entity.upcoming_shows_count + entity.past_shows_count - upcoming
+
+
+def sweep_show_counters():
+    now = _utc_now()
+    venue_ids = db.select(Venue.id).where(Venue.next_show_at <= now)
+    artist_ids = db.select(Artist.id).where(Artist.next_show_at <= now)
+    venues = db.session.scalar(db.select(db.func.count()).select_from(venue_ids.subquery()))
+    artists = db.session.scalar(db.select(db.func.count()).select_from(artist_ids.subquery()))
+    _refresh(venue_ids, artist_ids)
+    return venues, artists
+
+
+def refresh_show_partners(*criteria):
+    # Recounts the venues and artists of the shows matching criteria, for
+    # changes the "Show" triggers don't see, such as a soft delete.
+    _refresh(
+        db.select(Show.venue_id).where(*criteria),
+        db.select(Show.artist_id).where(*criteria),
+    )
+
+
+def rebuild_show_counters():
+    _refresh(db.select(Venue.id), db.select(Artist.id))
+
+
+def _drift(model, fk_column, other, other_fk_column):
+    # The join on `other` picks up the soft-delete filter, as in the trigger.
+    now = _utc_now()
+    upcoming = (
+        db.select(db.func.count(Show.id))
+        .join(other, other_fk_column == other.id)
+        .where(fk_column == model.id, Show.start_time > now)
+        .scalar_subquery()
+    )
+    past = (
+        db.select(db.func.count(Show.id))
+        .join(other, other_fk_column == other.id)
+        .where(fk_column == model.id, Show.start_time <= now)
+        .scalar_subquery()
+    )
+    return db.session.scalar(
+        db.select(db.func.count(model.id)).where(
+            db.or_(
+                model.upcoming_shows_count != upcoming,
+                model.past_shows_count != past,
+            )
+        )
+    )
+
+
+def counter_drift():
+    return (
+        _drift(Venue, Show.venue_id, Artist, Show.artist_id),
+        _drift(Artist, Show.artist_id, Venue, Show.venue_id),
+    )
@@ -0,0 +1,128 @@
+#----------------------------------------------------------------------------#
+# Bulk export
+#----------------------------------------------------------------------------#
+
+# Streams Venue, Artist or Show (with venue and artist names) as CSV or NDJSON
+# text chunks. Rows come from a server-side cursor and are written out one at
+# a time, so memory stays bounded by API_YIELD_PER rows whatever the table
+# size. `since` limits the export to rows changed after a timestamp, and a
+# show also counts as changed when its venue or artist was (a rename changes
+# the names exported with it); rows deleted since then are not reported.
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from flask import current_app
+
+from extensions import db
+from models import Venue, Artist, Show
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def stream_rows(statement):
+    result = db.session.execute(
+        statement.execution_options(yield_per=current_app.config['API_YIELD_PER'])
+    )
+    for row in result:
+        yield row._asdict()
+
+
+def _entity_columns(model):
+    skip = {'search_text', 'next_show_at'}
+    return [column for column in model.__table__.columns if column.key not in skip]
+
+
+def _venues():
+    return db.select(*_entity_columns(Venue)), Venue, (Venue.updated_at,)
+
+
+def _artists():
+    return db.select(*_entity_columns(Artist)), Artist, (Artist.updated_at,)
+
+
+def _shows():
+    statement = (
+        db.select(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label('venue_name'),
+            Show.artist_id,
+            Artist.name.label('artist_name'),
+            Show.updated_at,
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+    )
+    return statement, Show, (Show.updated_at, Venue.updated_at, Artist.updated_at)
+
+
+EXPORTS = {
+    'venues': _venues,
+    'artists': _artists,
+    'shows': _shows,
+}
+
+
+def export_statement(kind, since=None):
+    statement, model, updated = EXPORTS[kind]()
+    if since is not None:
+        statement = statement.where(db.or_(*[column > since for column in updated]))
+    return statement.order_by(model.id)
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        # Same "Jazz;Rock" form `flask import` reads back.
+        return ';'.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ndjson_chunks(rows):
+    for row in rows:
+        yield json.dumps(row, default=json_default, separators=(',', ':')) + '\n'
+
+
+FORMATS = {
+    'csv': csv_chunks,
+    'ndjson': ndjson_chunks,
+}
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(kind, format, since=None, gzip=False):
+    chunks = FORMATS[format](stream_rows(export_statement(kind, since)))
+    if gzip:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
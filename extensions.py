@@ -1,15 +1,13 @@
 #----------------------------------------------------------------------------#
-# App extensions and config
+# App extensions
 #----------------------------------------------------------------------------#
 
-from flask import Flask
+# Unbound extension objects; app.create_app() initialises them for each app.
+
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
-app = Flask(__name__)
-app.config.from_object('config')
+from replicas import RoutingSession
 
-moment = Moment(app)
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+moment = Moment()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -13,6 +13,10 @@ def test():
         abort("Aborted at user request.")
 
 
+def bench(scales="0.01,0.1,1", output="benchmarks.json"):
+    local("python -m benchmarks.routes --scales {} --output {}".format(scales, output))
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
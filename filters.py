@@ -2,14 +2,73 @@
 # Filters
 #----------------------------------------------------------------------------#
 
-from datetime import datetime
+import importlib
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
 
-import babel
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
 
-from extensions import app
 
+# Pattern letters whose output depends only on the date, or only on the time
+# of day; anything else (time zones) is formatted on every call.
+_DATE_FIELDS = frozenset('GyYuQqMLwWdDFgEec')
+_TIME_FIELDS = frozenset('ahHKkmsSAjJ')
+_FIELD_CACHE_SIZE = 10000
 
-def format_datetime(value, format='medium'):
+
+def _dates():
+    # babel.dates and its locale data are among the slowest imports at boot;
+    # load them on the first formatted date instead.
+    return importlib.import_module('babel.dates')
+
+
+class CompiledPattern:
+    # A Babel pattern parsed once, with each field's localized text memoized
+    # by the date or time it depends on. Babel itself looks up locale data for
+    # every field on every call, which dominates the cost of a cold call.
+
+    def __init__(self, pattern, locale):
+        self.pattern = _dates().parse_pattern(pattern)
+        self.locale = locale
+        self.fields = re.findall(r'%\((\w+)\)s', self.pattern.format)
+        self._values = {}
+
+    def apply(self, date):
+        values = {}
+        formatter = None
+        for name in self.fields:
+            if name[0] in _DATE_FIELDS:
+                key = (name, date.date())
+            elif name[0] in _TIME_FIELDS:
+                key = (name, date.time())
+            else:
+                key = None
+            value = self._values.get(key) if key is not None else None
+            if value is None:
+                if formatter is None:
+                    formatter = _dates().DateTimeFormat(date, self.locale)
+                value = formatter[name]
+                if key is not None:
+                    if len(self._values) >= _FIELD_CACHE_SIZE:
+                        self._values.clear()
+                    self._values[key] = value
+            values[name] = value
+        return self.pattern.format % values
+
+
+@lru_cache(maxsize=None)
+def _compiled(format, locale):
+    pattern = DATETIME_FORMATS.get(format, format)
+    if pattern in ('short', 'long'):
+        return None
+    return CompiledPattern(pattern, _dates().Locale.parse(locale))
+
+
+def _to_datetime(value):
     if isinstance(value, datetime):
         date = value
     else:
@@ -18,11 +77,28 @@ def format_datetime(value, format='medium'):
             date = datetime.fromisoformat(value_str)
         except ValueError:
             date = datetime.strptime(value_str, "%Y-%m-%d %H:%M:%S")
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
+    if date.tzinfo is None:
+        # Babel treats naive datetimes as UTC; attach it here so the result
+        # matches babel.dates.format_datetime().
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+def _apply(date, format, locale):
+    compiled = _compiled(format, locale)
+    if compiled is None:
+        return _dates().format_datetime(date, format, locale=locale)
+    return compiled.apply(date)
+
+
+@lru_cache(maxsize=4096)
+def _format(date, format, locale):
+    return _apply(date, format, locale)
+
+
+def format_datetime(value, format='medium', locale='en'):
+    return _format(_to_datetime(value), format, locale)
 
 
-app.jinja_env.filters['datetime'] = format_datetime
+def init_app(app):
+    app.jinja_env.filters['datetime'] = format_datetime
@@ -1,13 +1,21 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, HiddenField
 from wtforms.validators import DataRequired, AnyOf, URL
 
 class ShowForm(FlaskForm):
-    artist_id = StringField(
+    # The *_name fields are typeahead inputs (/api/suggest); picking a
+    # suggestion fills in the hidden id that is submitted.
+    artist_name = StringField(
+        'artist_name'
+    )
+    artist_id = HiddenField(
         'artist_id'
     )
-    venue_id = StringField(
+    venue_name = StringField(
+        'venue_name'
+    )
+    venue_id = HiddenField(
         'venue_id'
     )
     start_time = DateTimeField(
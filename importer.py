@@ -0,0 +1,303 @@
+#----------------------------------------------------------------------------#
+# Bulk import
+#----------------------------------------------------------------------------#
+
+# Loads venues, artists or shows from CSV or NDJSON. Each batch is validated
+# in Python, COPYed into a temporary staging table, cleared of rows that would
+# violate a constraint, and then upserted into the real table with a couple of
+# set-based statements in one transaction.
+#
+# Venues and artists are matched on their natural key (name, city, state):
+# existing rows are updated, new ones inserted. Shows name their venue and
+# artist by natural key and are skipped if the same show already exists.
+
+import csv
+import io
+import json
+import time
+
+from extensions import db
+from scheduling import parse_start_time
+
+
+class Reject(Exception):
+    pass
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _required(value):
+    value = _text(value)
+    if value is None:
+        raise Reject('missing value')
+    return value
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    value = (_text(value) or 'false').lower()
+    if value in ('true', 't', 'yes', 'y', '1'):
+        return True
+    if value in ('false', 'f', 'no', 'n', '0'):
+        return False
+    raise Reject(f'not a boolean: {value!r}')
+
+
+def _genres(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.strip().strip('{}').replace(';', ',').split(',')
+    return [genre.strip().strip('"') for genre in value if genre and genre.strip()]
+
+
+def _timestamp(value):
+    # Naive UTC, exactly as shows scheduled through the web are stored.
+    value = _required(value)
+    parsed = parse_start_time(value)
+    if parsed is None:
+        raise Reject(f'not a timestamp: {value!r}')
+    return parsed
+
+
+def _array_literal(values):
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"') for v in values)
+    return '{' + ','.join(f'"{v}"' for v in escaped) + '}'
+
+
+SEARCH_TEXT_SQL = (
+    "lower(r.name || ' ' || r.city || ', ' || r.state || ' ' || "
+    "array_to_string(r.genres, ' '))"
+)
+
+ENTITY_SPECS = {
+    'venues': {
+        'table': 'Venue',
+        'columns': [
+            ('name', 'text', _required),
+            ('city', 'text', _required),
+            ('state', 'text', _required),
+            ('address', 'text', _required),
+            ('phone', 'text', _text),
+            ('image_link', 'text', _text),
+            ('facebook_link', 'text', _text),
+            ('genres', 'text[]', _genres),
+            ('website_link', 'text', _text),
+            ('seeking_talent', 'boolean', _boolean),
+            ('seeking_description', 'text', _text),
+        ],
+    },
+    'artists': {
+        'table': 'Artist',
+        'columns': [
+            ('name', 'text', _required),
+            ('city', 'text', _required),
+            ('state', 'text', _required),
+            ('phone', 'text', _text),
+            ('genres', 'text[]', _genres),
+            ('image_link', 'text', _text),
+            ('facebook_link', 'text', _text),
+            ('website_link', 'text', _text),
+            ('seeking_venue', 'boolean', _boolean),
+            ('seeking_description', 'text', _text),
+        ],
+    },
+    'shows': {
+        'table': 'Show',
+        'columns': [
+            ('venue_name', 'text', _required),
+            ('venue_city', 'text', _required),
+            ('venue_state', 'text', _required),
+            ('artist_name', 'text', _required),
+            ('artist_city', 'text', _required),
+            ('artist_state', 'text', _required),
+            ('start_time', 'timestamp', _timestamp),
+        ],
+    },
+}
+
+NATURAL_KEY = ('name', 'city', 'state')
+UNIQUE_COLUMNS = ('phone', 'facebook_link')
+
+
+def read_records(path):
+    # Yields (line number, dict) pairs from a .csv or .ndjson/.jsonl file.
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, Reject(f'invalid JSON: {e}')
+                    continue
+                if not isinstance(record, dict):
+                    record = Reject('expected a JSON object')
+                yield line_number, record
+
+
+def _parse(spec, record):
+    if isinstance(record, Reject):
+        raise record
+    row = []
+    for name, sql_type, convert in spec['columns']:
+        try:
+            value = convert(record.get(name))
+        except Reject as e:
+            raise Reject(f'{name}: {e}')
+        if sql_type == 'text[]':
+            value = _array_literal(value)
+        row.append(value)
+    return row
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejects = []
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def _reject_rows(cursor, stats, sql, reason):
+    cursor.execute(sql)
+    for line, in sorted(set(cursor.fetchall())):
+        stats.rejects.append((line, reason))
+
+
+def _copy(cursor, spec, rows):
+    columns = ', '.join(f'{name} {sql_type}' for name, sql_type, _ in spec['columns'])
+    cursor.execute(f'CREATE TEMP TABLE import_rows (line integer, {columns}) ON COMMIT DROP')
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    names = ', '.join(['line'] + [name for name, _, _ in spec['columns']])
+    cursor.copy_expert(f'COPY import_rows ({names}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def _upsert_entities(cursor, spec, stats):
+    table = spec['table']
+    names = [name for name, _, _ in spec['columns']]
+    key = ', '.join(NATURAL_KEY)
+    r_key = ', '.join(f'r.{c}' for c in NATURAL_KEY)
+    t_key = ', '.join(f't.{c}' for c in NATURAL_KEY)
+
+    _reject_rows(cursor, stats, f'''
+        DELETE FROM import_rows r USING import_rows o
+        WHERE ({r_key}) = ({', '.join(f'o.{c}' for c in NATURAL_KEY)}) AND r.line > o.line
+        RETURNING r.line''', f'duplicate ({key}) earlier in the file')
+    for column in UNIQUE_COLUMNS:
+        _reject_rows(cursor, stats, f'''
+            DELETE FROM import_rows r USING import_rows o
+            WHERE r.{column} = o.{column} AND r.line > o.line
+            RETURNING r.line''', f'duplicate {column} earlier in the file')
+        _reject_rows(cursor, stats, f'''
+            DELETE FROM import_rows r USING "{table}" t
+            WHERE r.{column} = t.{column} AND ({t_key}) IS DISTINCT FROM ({r_key})
+            RETURNING r.line''', f'{column} already belongs to another {table.lower()}')
+
+    # A soft-deleted row keeps its natural key until it is purged.
+    _reject_rows(cursor, stats, f'''
+        DELETE FROM import_rows r USING "{table}" t
+        WHERE ({t_key}) = ({r_key}) AND t.deleted_at IS NOT NULL
+        RETURNING r.line''', f'{table.lower()} was deleted')
+
+    assignments = ', '.join(f'{name} = r.{name}' for name in names)
+    cursor.execute(f'''
+        UPDATE "{table}" t SET {assignments}, search_text = {SEARCH_TEXT_SQL}
+        FROM import_rows r WHERE ({t_key}) = ({r_key})''')
+    stats.updated += cursor.rowcount
+    cursor.execute(f'''
+        INSERT INTO "{table}" ({', '.join(names)}, search_text)
+        SELECT {', '.join(f'r.{name}' for name in names)}, {SEARCH_TEXT_SQL}
+        FROM import_rows r
+        WHERE NOT EXISTS (SELECT 1 FROM "{table}" t WHERE ({t_key}) = ({r_key}))''')
+    stats.inserted += cursor.rowcount
+
+
+def _lookup(table, prefix):
+    return f'''(
+        SELECT t.id FROM "{table}" t
+        WHERE (t.name, t.city, t.state) = (r.{prefix}_name, r.{prefix}_city, r.{prefix}_state)
+          AND t.deleted_at IS NULL
+        ORDER BY t.id LIMIT 1)'''
+
+
+def _upsert_shows(cursor, spec, stats):
+    for table, prefix in (('Venue', 'venue'), ('Artist', 'artist')):
+        _reject_rows(cursor, stats, f'''
+            DELETE FROM import_rows r WHERE {_lookup(table, prefix)} IS NULL
+            RETURNING r.line''', f'unknown {prefix}')
+    cursor.execute(f'''
+        INSERT INTO "Show" (venue_id, artist_id, start_time)
+        SELECT DISTINCT k.venue_id, k.artist_id, k.start_time
+        FROM (
+            SELECT {_lookup('Venue', 'venue')} AS venue_id,
+                   {_lookup('Artist', 'artist')} AS artist_id,
+                   r.start_time
+            FROM import_rows r
+        ) k
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "Show" s
+            WHERE s.venue_id = k.venue_id
+              AND s.artist_id = k.artist_id
+              AND s.start_time = k.start_time)''')
+    stats.inserted += cursor.rowcount
+
+
+def _load_batch(kind, rows, stats):
+    spec = ENTITY_SPECS[kind]
+    cursor = db.session.connection().connection.cursor()
+    try:
+        _copy(cursor, spec, rows)
+        if kind == 'shows':
+            _upsert_shows(cursor, spec, stats)
+        else:
+            _upsert_entities(cursor, spec, stats)
+    finally:
+        cursor.close()
+    db.session.commit()
+
+
+def import_file(kind, path, batch_size, on_batch=None):
+    spec = ENTITY_SPECS[kind]
+    stats = ImportStats()
+    batch = []
+    for line, record in read_records(path):
+        stats.read += 1
+        try:
+            batch.append([line] + _parse(spec, record))
+        except Reject as e:
+            stats.rejects.append((line, str(e)))
+            continue
+        if len(batch) >= batch_size:
+            _load_batch(kind, batch, stats)
+            batch = []
+            if on_batch:
+                on_batch(stats)
+    if batch:
+        _load_batch(kind, batch, stats)
+        if on_batch:
+            on_batch(stats)
+    stats.rejects.sort()
+    return stats
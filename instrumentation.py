@@ -0,0 +1,118 @@
+#----------------------------------------------------------------------------#
+# SQL instrumentation
+#----------------------------------------------------------------------------#
+
+# Counts the statements each request runs and the time spent in them, logs a
+# warning when a request crosses SQL_WARN_QUERY_COUNT or SQL_WARN_TIME_MS, and
+# flags the same statement text repeated SQL_N_PLUS_ONE_THRESHOLD times as a
+# suspected N+1. With SQL_RAISE_ON_LAZY_LOAD, lazily loading Venue.shows or
+# Artist.shows raises instead of silently issuing one query per object.
+
+import heapq
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Venue, Artist
+
+
+class LazyLoadError(RuntimeError):
+    pass
+
+
+class RequestSQLStats:
+    def __init__(self, keep_slowest):
+        self.count = 0
+        self.total = 0.0
+        self.statements = Counter()
+        self.keep_slowest = keep_slowest
+        self._slowest = []
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total += duration
+        self.statements[statement] += 1
+        entry = (duration, self.count, statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        return [(duration, statement) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold):
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+def current_stats():
+    if not has_request_context() or not current_app.config['SQL_INSTRUMENTATION']:
+        return None
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = RequestSQLStats(current_app.config['SQL_SLOWEST_STATEMENTS'])
+    return stats
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def _short(statement, limit=200):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def report_sql_stats(response):
+    stats = current_stats()
+    if stats is None:
+        return response
+    total_ms = stats.total * 1000
+    if current_app.config['SQL_TIMING_HEADERS']:
+        response.headers['X-SQL-Queries'] = str(stats.count)
+        response.headers['X-SQL-Time-ms'] = f'{total_ms:.1f}'
+    if stats.count > current_app.config['SQL_WARN_QUERY_COUNT'] or total_ms > current_app.config['SQL_WARN_TIME_MS']:
+        slowest = '; '.join(f'{d * 1000:.1f}ms {_short(s)}' for d, s in stats.slowest)
+        current_app.logger.warning(
+            '%s %s ran %d queries in %.1fms. Slowest: %s',
+            request.method, request.path, stats.count, total_ms, slowest,
+        )
+    for statement, n in stats.repeated(current_app.config['SQL_N_PLUS_ONE_THRESHOLD']):
+        current_app.logger.warning(
+            'Suspected N+1 in %s %s: %d x %s',
+            request.method, request.path, n, _short(statement),
+        )
+    return response
+
+
+WATCHED_RELATIONSHIPS = {Venue.shows.property, Artist.shows.property}
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _raise_on_lazy_load(orm_execute_state):
+    if not current_app.config['SQL_RAISE_ON_LAZY_LOAD'] or orm_execute_state.lazy_loaded_from is None:
+        return
+    prop = getattr(orm_execute_state.loader_strategy_path, 'prop', None)
+    if prop in WATCHED_RELATIONSHIPS:
+        raise LazyLoadError(
+            f'Lazy load of {prop} (SQL_RAISE_ON_LAZY_LOAD is on); '
+            f'join or eager-load the shows instead.'
+        )
+
+
+def init_app(app):
+    app.after_request(report_sql_stats)
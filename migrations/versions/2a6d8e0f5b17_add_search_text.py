@@ -0,0 +1,40 @@
+"""add trigram search text to venue and artist
+
+Revision ID: 2a6d8e0f5b17
+Revises: 7e1f3a2b9c4d
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a6d8e0f5b17'
+down_revision = '7e1f3a2b9c4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('search_text', sa.Text(), nullable=True))
+        # Same document as models.search_text_for().
+        op.execute(
+            f'UPDATE "{table}" SET search_text = lower('
+            "name || ' ' || city || ', ' || state || ' ' || "
+            "array_to_string(genres, ' '))"
+        )
+        op.alter_column(table, 'search_text', nullable=False)
+        op.create_index(
+            f'ix_{table}_search_text_trgm', table, ['search_text'],
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_search_text_trgm', table_name=table)
+        op.drop_column(table, 'search_text')
@@ -0,0 +1,57 @@
+"""normalize genres and add GIN indexes on them
+
+Revision ID: 3e5f7a9c1b24
+Revises: c7f2a4d6e813
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3e5f7a9c1b24'
+down_revision = 'c7f2a4d6e813'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    for table in TABLES:
+        # Databases created before genres became an array still hold the
+        # '{Jazz,Rock}' text form; convert the column in place.
+        op.execute(
+            'DO $$ BEGIN\n'
+            '    IF (SELECT data_type FROM information_schema.columns\n'
+            f"        WHERE table_schema = current_schema() AND table_name = '{table}'\n"
+            "        AND column_name = 'genres') <> 'ARRAY' THEN\n"
+            f'        ALTER TABLE "{table}" ALTER COLUMN genres TYPE varchar[]\n'
+            "            USING string_to_array(btrim(genres, '{}'), ',');\n"
+            '    END IF;\n'
+            'END $$'
+        )
+        # Split elements that still hold a whole '{a,b}' literal or a
+        # comma-separated list, drop quotes, blanks and surrounding spaces,
+        # and keep search_text in step (same expression as 2a6d8e0f5b17).
+        op.execute(
+            f'UPDATE "{table}" t SET genres = n.genres, search_text = lower('
+            "t.name || ' ' || t.city || ', ' || t.state || ' ' || "
+            "array_to_string(n.genres, ' ')) "
+            'FROM (SELECT id, ARRAY('
+            "SELECT btrim(part, ' \"') "
+            'FROM unnest(genres) WITH ORDINALITY AS e(value, i), '
+            "unnest(string_to_array(btrim(e.value, '{}'), ',')) WITH ORDINALITY AS p(part, j) "
+            "WHERE btrim(part, ' \"') <> '' ORDER BY i, j"
+            f')::varchar[] AS genres FROM "{table}") n '
+            'WHERE t.id = n.id AND t.genres IS DISTINCT FROM n.genres'
+        )
+        op.create_index(
+            f'ix_{table}_genres', table, ['genres'], postgresql_using='gin',
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_genres', table_name=table)
@@ -0,0 +1,29 @@
+"""add keyset pagination indexes
+
+Revision ID: 5d0b7c9e3f21
+Revises: 2a6d8e0f5b17
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0b7c9e3f21'
+down_revision = '2a6d8e0f5b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (start_time, id) serves both ORDER BY start_time and the /shows cursor.
+    op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'])
+    op.drop_index('ix_Show_start_time', table_name='Show')
+    op.create_index('ix_Venue_state_city_id', 'Venue', ['state', 'city', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_Venue_state_city_id', table_name='Venue')
+    op.create_index('ix_Show_start_time', 'Show', ['start_time'])
+    op.drop_index('ix_Show_start_time_id', table_name='Show')
@@ -0,0 +1,50 @@
+"""record the last delete on each table
+
+Revision ID: 8d2e4f6a0c35
+Revises: 3e5f7a9c1b24
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e4f6a0c35'
+down_revision = '3e5f7a9c1b24'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    # max(updated_at) moves on every insert and update, but not when a row
+    # disappears; listing validators (conditional.py) read this as well.
+    op.create_table(
+        'table_deletions',
+        sa.Column('table_name', sa.Text(), primary_key=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    )
+    op.execute(
+        'CREATE OR REPLACE FUNCTION record_deletion() RETURNS trigger AS $$\n'
+        'BEGIN\n'
+        '    INSERT INTO table_deletions (table_name, deleted_at)\n'
+        "    VALUES (TG_TABLE_NAME, now() AT TIME ZONE 'utc')\n"
+        '    ON CONFLICT (table_name) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;\n'
+        '    RETURN NULL;\n'
+        'END;\n$$ LANGUAGE plpgsql'
+    )
+    for table in TABLES:
+        op.execute(
+            f'CREATE TRIGGER record_deletion AFTER DELETE OR TRUNCATE ON "{table}" '
+            f'FOR EACH STATEMENT EXECUTE PROCEDURE record_deletion()'
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS record_deletion ON "{table}"')
+    op.execute('DROP FUNCTION IF EXISTS record_deletion()')
+    op.drop_table('table_deletions')
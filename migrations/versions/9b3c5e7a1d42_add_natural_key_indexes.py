@@ -0,0 +1,27 @@
+"""add natural key indexes for bulk import
+
+Revision ID: 9b3c5e7a1d42
+Revises: e4a91c6d2b80
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3c5e7a1d42'
+down_revision = 'e4a91c6d2b80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # `flask import` matches venues and artists on (name, city, state).
+    op.create_index('ix_Venue_name_city_state', 'Venue', ['name', 'city', 'state'])
+    op.create_index('ix_Artist_name_city_state', 'Artist', ['name', 'city', 'state'])
+
+
+def downgrade():
+    op.drop_index('ix_Artist_name_city_state', table_name='Artist')
+    op.drop_index('ix_Venue_name_city_state', table_name='Venue')
@@ -0,0 +1,33 @@
+"""add id to the per-venue and per-artist show indexes
+
+Revision ID: b4d6f8a0c2e1
+Revises: f1a3c5e7b9d2
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e1'
+down_revision = 'f1a3c5e7b9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The past-shows pages seek on (start_time, id) within one venue or
+    # artist, newest first; with id in the index that is a single backward
+    # range scan with no sort.
+    op.create_index('ix_Show_venue_id_start_time_id', 'Show', ['venue_id', 'start_time', 'id'])
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
+    op.create_index('ix_Show_artist_id_start_time_id', 'Show', ['artist_id', 'start_time', 'id'])
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+
+
+def downgrade():
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'])
+    op.drop_index('ix_Show_artist_id_start_time_id', table_name='Show')
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'])
+    op.drop_index('ix_Show_venue_id_start_time_id', table_name='Show')
@@ -0,0 +1,92 @@
+"""soft delete for venues and artists, ON DELETE CASCADE for shows
+
+Revision ID: c3e5a7b9d1f0
+Revises: b4d6f8a0c2e1
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d1f0'
+down_revision = 'b4d6f8a0c2e1'
+branch_labels = None
+depends_on = None
+
+
+# Postgres' default names for the foreign keys on "Show", as migration
+# f1a3c5e7b9d2 creates them.
+FOREIGN_KEYS = {
+    'Show_venue_id_fkey': ('Venue', 'venue_id'),
+    'Show_artist_id_fkey': ('Artist', 'artist_id'),
+}
+
+# refresh_show_counters() as of migration e4a91c6d2b80, with {live} added to
+# the join on "Show": the body below skips shows whose other side is
+# soft-deleted, so an artist stops counting the shows of a deleted venue.
+REFRESH_TEMPLATE = '''
+    UPDATE "{table}" t SET
+        upcoming_shows_count = c.upcoming,
+        past_shows_count = c.past,
+        next_show_at = c.next_show_at
+    FROM (
+        SELECT ids.id,
+               count(s.id) FILTER (WHERE s.start_time > now_utc) AS upcoming,
+               count(s.id) FILTER (WHERE s.start_time <= now_utc) AS past,
+               min(s.start_time) FILTER (WHERE s.start_time > now_utc) AS next_show_at
+        FROM (SELECT DISTINCT unnest({ids}) AS id) ids
+        LEFT JOIN {shows} ON s.{fk} = ids.id
+        GROUP BY ids.id
+    ) c
+    WHERE t.id = c.id;
+'''
+
+LIVE_SHOWS = '("Show" s JOIN "{other}" o ON o.id = s.{other_fk} AND o.deleted_at IS NULL)'
+
+
+def _refresh_function(live):
+    def shows(other, other_fk):
+        return LIVE_SHOWS.format(other=other, other_fk=other_fk) if live else '"Show" s'
+
+    op.execute(
+        'CREATE OR REPLACE FUNCTION refresh_show_counters('
+        'venue_ids integer[], artist_ids integer[]) RETURNS void AS $$\n'
+        'DECLARE\n'
+        "    now_utc timestamp := now() AT TIME ZONE 'utc';\n"
+        'BEGIN\n'
+        + REFRESH_TEMPLATE.format(
+            table='Venue', ids='venue_ids', fk='venue_id', shows=shows('Artist', 'artist_id'))
+        + REFRESH_TEMPLATE.format(
+            table='Artist', ids='artist_ids', fk='artist_id', shows=shows('Venue', 'venue_id'))
+        + 'END;\n$$ LANGUAGE plpgsql'
+    )
+
+
+def _replace_foreign_keys(ondelete):
+    for name, (table, column) in FOREIGN_KEYS.items():
+        op.drop_constraint(name, 'Show', type_='foreignkey')
+        op.create_foreign_key(name, 'Show', table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    # Deleting a venue or artist now removes its shows in the database, in
+    # one statement, rather than through the ORM loading each of them.
+    _replace_foreign_keys('CASCADE')
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        # Only the rows waiting for `flask purge-deleted`.
+        op.create_index(
+            f'ix_{table}_deleted_at', table, ['deleted_at'],
+            postgresql_where=sa.text('deleted_at IS NOT NULL'),
+        )
+    _refresh_function(live=True)
+
+
+def downgrade():
+    _refresh_function(live=False)
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_deleted_at', table_name=table)
+        op.drop_column(table, 'deleted_at')
+    _replace_foreign_keys(None)
@@ -0,0 +1,51 @@
+"""add updated_at to venue, artist and show
+
+Revision ID: c7f2a4d6e813
+Revises: 9b3c5e7a1d42
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f2a4d6e813'
+down_revision = '9b3c5e7a1d42'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    # Maintained in the database so raw SQL writers (flask import, the counter
+    # triggers) bump it too. Naive UTC, like the rest of the schema.
+    op.execute(
+        'CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$\n'
+        'BEGIN\n'
+        '    IF NEW IS DISTINCT FROM OLD THEN\n'
+        "        NEW.updated_at := now() AT TIME ZONE 'utc';\n"
+        '    END IF;\n'
+        '    RETURN NEW;\n'
+        'END;\n$$ LANGUAGE plpgsql'
+    )
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), nullable=False,
+            server_default=sa.text("(now() AT TIME ZONE 'utc')"),
+        ))
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+        op.execute(
+            f'CREATE TRIGGER set_updated_at BEFORE UPDATE ON "{table}" '
+            f'FOR EACH ROW EXECUTE PROCEDURE set_updated_at()'
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS set_updated_at ON "{table}"')
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
+    op.execute('DROP FUNCTION IF EXISTS set_updated_at()')
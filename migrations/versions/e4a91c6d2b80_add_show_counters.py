@@ -0,0 +1,100 @@
+"""add denormalized show counters to venue and artist
+
+Revision ID: e4a91c6d2b80
+Revises: 5d0b7c9e3f21
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a91c6d2b80'
+down_revision = '5d0b7c9e3f21'
+branch_labels = None
+depends_on = None
+
+
+REFRESH_TEMPLATE = '''
+    UPDATE "{table}" t SET
+        upcoming_shows_count = c.upcoming,
+        past_shows_count = c.past,
+        next_show_at = c.next_show_at
+    FROM (
+        SELECT ids.id,
+               count(s.id) FILTER (WHERE s.start_time > now_utc) AS upcoming,
+               count(s.id) FILTER (WHERE s.start_time <= now_utc) AS past,
+               min(s.start_time) FILTER (WHERE s.start_time > now_utc) AS next_show_at
+        FROM (SELECT DISTINCT unnest({ids}) AS id) ids
+        LEFT JOIN "Show" s ON s.{fk} = ids.id
+        GROUP BY ids.id
+    ) c
+    WHERE t.id = c.id;
+'''
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_at', sa.DateTime(), nullable=True))
+        op.create_index(f'ix_{table}_next_show_at', table, ['next_show_at'])
+
+    # Recomputes the counters of the given venues and artists from "Show".
+    # Timestamps are naive UTC, matching datetime.utcnow() in the app.
+    op.execute(
+        'CREATE OR REPLACE FUNCTION refresh_show_counters('
+        'venue_ids integer[], artist_ids integer[]) RETURNS void AS $$\n'
+        'DECLARE\n'
+        "    now_utc timestamp := now() AT TIME ZONE 'utc';\n"
+        'BEGIN\n'
+        + REFRESH_TEMPLATE.format(table='Venue', ids='venue_ids', fk='venue_id')
+        + REFRESH_TEMPLATE.format(table='Artist', ids='artist_ids', fk='artist_id')
+        + 'END;\n$$ LANGUAGE plpgsql'
+    )
+
+    # Statement-level triggers with transition tables, so a bulk insert or a
+    # cascaded delete refreshes each affected venue/artist once.
+    for event, tables in (
+        ('INSERT', ('new_rows',)),
+        ('DELETE', ('old_rows',)),
+        ('UPDATE', ('old_rows', 'new_rows')),
+    ):
+        name = f'show_counters_{event.lower()}'
+        calls = ''.join(
+            f'    PERFORM refresh_show_counters('
+            f'ARRAY(SELECT venue_id FROM {rows}), '
+            f'ARRAY(SELECT artist_id FROM {rows}));\n'
+            for rows in tables
+        )
+        op.execute(
+            f'CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\n'
+            f'BEGIN\n{calls}    RETURN NULL;\nEND;\n$$ LANGUAGE plpgsql'
+        )
+        referencing = ' '.join(
+            f'{"NEW" if rows == "new_rows" else "OLD"} TABLE AS {rows}'
+            for rows in tables
+        )
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON "Show" '
+            f'REFERENCING {referencing} '
+            f'FOR EACH STATEMENT EXECUTE PROCEDURE {name}()'
+        )
+
+    op.execute(
+        'SELECT refresh_show_counters('
+        'ARRAY(SELECT id FROM "Venue"), ARRAY(SELECT id FROM "Artist"))'
+    )
+
+
+def downgrade():
+    for event in ('insert', 'delete', 'update'):
+        op.execute(f'DROP TRIGGER IF EXISTS show_counters_{event} ON "Show"')
+        op.execute(f'DROP FUNCTION IF EXISTS show_counters_{event}()')
+    op.execute('DROP FUNCTION IF EXISTS refresh_show_counters(integer[], integer[])')
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_next_show_at', table_name=table)
+        op.drop_column(table, 'next_show_at')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
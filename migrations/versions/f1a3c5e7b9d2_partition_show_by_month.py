@@ -0,0 +1,164 @@
+"""partition "Show" by month of start_time
+
+Revision ID: f1a3c5e7b9d2
+Revises: 8d2e4f6a0c35
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a3c5e7b9d2'
+down_revision = '8d2e4f6a0c35'
+branch_labels = None
+depends_on = None
+
+
+# Needs PostgreSQL 13 or later (row triggers on a partitioned table).
+
+INDEXES = {
+    'ix_Show_venue_id_start_time': ['venue_id', 'start_time'],
+    'ix_Show_artist_id_start_time': ['artist_id', 'start_time'],
+    'ix_Show_start_time_id': ['start_time', 'id'],
+    'ix_Show_updated_at': ['updated_at'],
+}
+
+# The foreign keys are added by _finish_show_table() once "Show_old" is gone:
+# declared here, while it still holds "Show_venue_id_fkey" and
+# "Show_artist_id_fkey", they would get Postgres' fallback names ("..._fkey1").
+FOREIGN_KEYS = {
+    'Show_venue_id_fkey': ('Venue', 'venue_id'),
+    'Show_artist_id_fkey': ('Artist', 'artist_id'),
+}
+
+COLUMNS = '''
+    venue_id integer NOT NULL,
+    artist_id integer NOT NULL,
+    start_time timestamp without time zone NOT NULL,
+    updated_at timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+'''
+
+# One partition per calendar month, "Show_2026_10", created ahead of time by
+# `flask shows partitions` (and by the seed). Rows outside every partition
+# land in "Show_default"; creating their month's partition later moves them
+# out of it. The move targets the partitions directly, so the statement
+# triggers on "Show" (counters, table_deletions) don't fire: no show is
+# added or removed.
+CREATE_PARTITIONS = '''
+CREATE OR REPLACE FUNCTION create_show_partitions(first_month timestamp, last_month timestamp)
+RETURNS integer AS $$
+DECLARE
+    lower_bound timestamp := date_trunc('month', first_month);
+    upper_bound timestamp;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE lower_bound <= last_month LOOP
+        upper_bound := lower_bound + interval '1 month';
+        partition_name := 'Show_' || to_char(lower_bound, 'YYYY_MM');
+        IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE "Show" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM "Show_default" WHERE start_time >= %L AND start_time < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE "Show" ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound, upper_bound
+            );
+            created := created + 1;
+        END IF;
+        lower_bound := upper_bound;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql
+'''
+
+
+def _create_triggers():
+    op.execute(
+        'CREATE TRIGGER set_updated_at BEFORE UPDATE ON "Show" '
+        'FOR EACH ROW EXECUTE PROCEDURE set_updated_at()'
+    )
+    for event, referencing in (
+        ('INSERT', 'NEW TABLE AS new_rows'),
+        ('DELETE', 'OLD TABLE AS old_rows'),
+        ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ):
+        name = f'show_counters_{event.lower()}'
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON "Show" '
+            f'REFERENCING {referencing} '
+            f'FOR EACH STATEMENT EXECUTE PROCEDURE {name}()'
+        )
+    op.execute(
+        'CREATE TRIGGER record_deletion AFTER DELETE OR TRUNCATE ON "Show" '
+        'FOR EACH STATEMENT EXECUTE PROCEDURE record_deletion()'
+    )
+
+
+def _replace_show_table(create_sql):
+    # Moves the old table aside and creates the new one on the same id
+    # sequence. _finish_show_table() then copies the rows before any trigger
+    # exists (the counters are already right) and rebuilds foreign keys,
+    # indexes and triggers.
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_old"')
+    op.execute('ALTER INDEX "Show_pkey" RENAME TO "Show_old_pkey"')
+    for name in INDEXES:
+        op.drop_index(name, table_name='Show_old')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute(create_sql)
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+
+
+def _finish_show_table():
+    op.execute(
+        'INSERT INTO "Show" (id, venue_id, artist_id, start_time, updated_at) '
+        'SELECT id, venue_id, artist_id, start_time, updated_at FROM "Show_old"'
+    )
+    op.execute('DROP TABLE "Show_old"')
+    for name, (table, column) in FOREIGN_KEYS.items():
+        op.create_foreign_key(name, 'Show', table, [column], ['id'])
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'Show', columns)
+    _create_triggers()
+    op.execute('ANALYZE "Show"')
+
+
+def upgrade():
+    # The partition key has to be part of the primary key. The model still
+    # maps id alone as its identity, so ORM inserts are unchanged.
+    _replace_show_table(
+        'CREATE TABLE "Show" (\n'
+        '    id integer NOT NULL DEFAULT nextval(\'"Show_id_seq"\'::regclass),\n'
+        + COLUMNS +
+        '    CONSTRAINT "Show_pkey" PRIMARY KEY (id, start_time)\n'
+        ') PARTITION BY RANGE (start_time)'
+    )
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+    op.execute(CREATE_PARTITIONS)
+    # From the first show through a year from now; anything later waits in
+    # "Show_default" for `flask shows partitions`.
+    op.execute(
+        'SELECT create_show_partitions('
+        '(SELECT coalesce(min(start_time), now() AT TIME ZONE \'utc\') FROM "Show_old"), '
+        '(now() AT TIME ZONE \'utc\') + interval \'12 months\')'
+    )
+    _finish_show_table()
+
+
+def downgrade():
+    _replace_show_table(
+        'CREATE TABLE "Show" (\n'
+        '    id integer NOT NULL DEFAULT nextval(\'"Show_id_seq"\'::regclass),\n'
+        + COLUMNS +
+        '    CONSTRAINT "Show_pkey" PRIMARY KEY (id)\n'
+        ')'
+    )
+    op.execute('DROP FUNCTION IF EXISTS create_show_partitions(timestamp, timestamp)')
+    _finish_show_table()
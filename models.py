@@ -6,9 +6,24 @@ from sqlalchemy.dialects.postgresql import ARRAY
 
 from extensions import db
 
+# updated_at is bumped by the set_updated_at() trigger on every row change
+# (see migration c7f2a4d6e813), so it also covers writes made in raw SQL.
+UTC_NOW = db.text("(now() AT TIME ZONE 'utc')")
+
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_Venue_state_city_id', 'state', 'city', 'id'),
+        db.Index('ix_Venue_name_city_state', 'name', 'city', 'state'),
+        db.Index(
+            'ix_Venue_search_text_trgm', 'search_text',
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        ),
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Venue_deleted_at', 'deleted_at', postgresql_where=db.text('deleted_at IS NOT NULL')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -22,16 +37,35 @@ class Venue(db.Model):
     website_link = db.Column(db.String(500))
     seeking_talent = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
+    search_text = db.Column(db.Text, nullable=False)
+    # Maintained by the "Show" triggers and `flask counters sweep`.
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    next_show_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False, index=True)
+    # Set instead of deleting when SOFT_DELETE is on; see soft_delete.py.
+    deleted_at = db.Column(db.DateTime)
     shows = db.relationship(
         'Show',
         back_populates='venue',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy=True,
     )
 
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_name_city_state', 'name', 'city', 'state'),
+        db.Index(
+            'ix_Artist_search_text_trgm', 'search_text',
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        ),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Artist_deleted_at', 'deleted_at', postgresql_where=db.text('deleted_at IS NOT NULL')),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -44,20 +78,74 @@ class Artist(db.Model):
     website_link = db.Column(db.String(500))
     seeking_venue = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
+    search_text = db.Column(db.Text, nullable=False)
+    # Maintained by the "Show" triggers and `flask counters sweep`.
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    next_show_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False, index=True)
+    # Set instead of deleting when SOFT_DELETE is on; see soft_delete.py.
+    deleted_at = db.Column(db.DateTime)
     shows = db.relationship(
         'Show',
         back_populates='artist',
         cascade='all, delete-orphan',
+        passive_deletes=True,
         lazy=True,
     )
 
 
 class Show(db.Model):
+    # Partitioned by month of start_time in the database (migration
+    # f1a3c5e7b9d2), where the primary key is (id, start_time); id alone is
+    # still unique through its sequence and is the identity mapped here.
     __tablename__ = 'Show'
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time_id', 'venue_id', 'start_time', 'id'),
+        db.Index('ix_Show_artist_id_start_time_id', 'artist_id', 'start_time', 'id'),
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
+    # ON DELETE CASCADE: the shows of a deleted venue or artist go in the same
+    # statement, without the ORM loading them (passive_deletes above).
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=UTC_NOW, nullable=False, index=True)
     venue = db.relationship('Venue', back_populates='shows')
     artist = db.relationship('Artist', back_populates='shows')
+
+
+def clean_genres(genres):
+    # One stripped, non-empty string per genre, in the order given, so the
+    # GIN index on genres can answer exact-match filters.
+    seen = []
+    for genre in genres or []:
+        genre = genre.strip()
+        if genre and genre not in seen:
+            seen.append(genre)
+    return seen
+
+
+@db.event.listens_for(Venue, 'before_insert')
+@db.event.listens_for(Venue, 'before_update')
+@db.event.listens_for(Artist, 'before_insert')
+@db.event.listens_for(Artist, 'before_update')
+def normalize_genres(mapper, connection, target):
+    target.genres = clean_genres(target.genres)
+
+
+def search_text_for(target):
+    # Lower-cased "name city, state genres" document matched by /*/search.
+    # Keep in step with the backfill in migration 2a6d8e0f5b17.
+    genres = ' '.join(target.genres or [])
+    return f"{target.name} {target.city}, {target.state} {genres}".lower()
+
+
+@db.event.listens_for(Venue, 'before_insert')
+@db.event.listens_for(Venue, 'before_update')
+@db.event.listens_for(Artist, 'before_insert')
+@db.event.listens_for(Artist, 'before_update')
+def refresh_search_text(mapper, connection, target):
+    target.search_text = search_text_for(target)
@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Keyset pagination
+#----------------------------------------------------------------------------#
+
+import base64
+import json
+from datetime import datetime
+
+from extensions import db
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Cannot encode {value!r} in a cursor')
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=_default).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    # Returns None for a missing or tampered cursor, which the routes treat as
+    # "start from the first page".
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(types):
+            return None
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(query, columns, key_of, page_size, after=None, before=None, descending=False):
+    # Seeks on the (columns) row value instead of using OFFSET, so any page
+    # costs one index range scan of page_size + 1 rows.
+    # The extra bound on the leading column says the same thing as the row
+    # comparison in a form partition pruning understands.
+    # With descending=True pages run from the highest key down (every column
+    # descending, so the row comparison still holds), and `after` moves on
+    # towards lower keys.
+    key = db.tuple_(*columns)
+
+    def seek(query, cursor, upwards):
+        if upwards:
+            return query.filter(key > db.tuple_(*cursor), columns[0] >= cursor[0])
+        return query.filter(key < db.tuple_(*cursor), columns[0] <= cursor[0])
+
+    def ordered(query, ascending):
+        return query.order_by(*[column if ascending else column.desc() for column in columns])
+
+    query = query.order_by(None)
+    if before is not None:
+        rows = (
+            ordered(seek(query, before, descending), descending)
+            .limit(page_size + 1)
+            .all()
+        )
+        has_prev = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            query = seek(query, after, not descending)
+        rows = ordered(query, not descending).limit(page_size + 1).all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev = after is not None
+    next_cursor = encode_cursor(key_of(rows[-1])) if has_next and rows else None
+    prev_cursor = encode_cursor(key_of(rows[0])) if has_prev and rows else None
+    return Page(rows, next_cursor, prev_cursor)
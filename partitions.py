@@ -0,0 +1,45 @@
+#----------------------------------------------------------------------------#
+# Show partitions
+#----------------------------------------------------------------------------#
+
+# "Show" is range-partitioned by month of start_time (see migration
+# f1a3c5e7b9d2), so a query bounded on start_time only scans the months it
+# covers. Future months have to exist before their shows arrive, otherwise
+# those rows go to "Show_default", which every query scans. Run
+# ensure_show_partitions() periodically (e.g. monthly from cron, through
+# `flask shows partitions`) to stay SHOW_PARTITION_MONTHS_AHEAD ahead.
+
+from datetime import datetime
+
+from extensions import db
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month, months):
+    month_index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def create_show_partitions(first, last):
+    # Creates any missing partition for the months from first to last,
+    # moving their rows out of "Show_default". Returns how many it created.
+    return db.session.scalar(db.select(db.func.create_show_partitions(first, last)))
+
+
+def ensure_show_partitions(months_ahead, now=None):
+    month = _month_start(now or datetime.utcnow())
+    return create_show_partitions(month, _add_months(month, months_ahead))
+
+
+def show_partitions():
+    # (name, bounds, estimated rows) per partition, oldest first; the
+    # estimates come from the last ANALYZE.
+    return db.session.execute(db.text(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = \'"Show"\'::regclass '
+        'ORDER BY c.relname'
+    )).all()
@@ -0,0 +1,118 @@
+#----------------------------------------------------------------------------#
+# Connection pooling
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'wait_total_ms': self.wait_total * 1000,
+                'wait_avg_ms': self.wait_total / attempts * 1000 if attempts else 0.0,
+                'wait_max_ms': self.wait_max * 1000,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a connection,
+    # including the ones that ended in a "QueuePool limit" timeout. Each
+    # engine's pool (the primary's, every replica's) keeps its own metrics,
+    # carried over when the engine is disposed and the pool recreated.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+        return super()._create_connection()
+
+
+def engine_options(config):
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    connect_args = {}
+    if config['DB_PGBOUNCER']:
+        # PgBouncer in transaction-pooling mode owns the pooling, so keep no
+        # idle connections of our own. It also rejects startup parameters and
+        # cannot carry prepared statements across transactions: psycopg2
+        # never prepares server-side, and statement_timeout has to be set on
+        # the database role instead (ALTER ROLE ... SET statement_timeout).
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.metrics.snapshot())
+    return stats
@@ -0,0 +1,149 @@
+#----------------------------------------------------------------------------#
+# Queries
+#----------------------------------------------------------------------------#
+
+# Query builders shared by the routes and the `flask check-plans` command, so
+# the plans we check are the plans the pages actually run.
+
+from extensions import db
+from models import Venue, Artist, Show
+
+
+LISTING_FILTERS = ('genre', 'city', 'state')
+
+
+def listing_filters(args):
+    return {name: args[name] for name in LISTING_FILTERS if args.get(name)}
+
+
+def filter_listing(query, model, genre=None, city=None, state=None):
+    # genres @> ARRAY[genre] is answered by the GIN index on genres.
+    if genre:
+        query = query.filter(model.genres.contains([genre]))
+    if city:
+        query = query.filter(model.city == city)
+    if state:
+        query = query.filter(model.state == state)
+    return query
+
+
+def venue_listing_query(**filters):
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label('num_upcoming_shows'),
+    )
+    return filter_listing(query, Venue, **filters)
+
+
+def artist_listing_query(**filters):
+    return filter_listing(db.session.query(Artist.id, Artist.name), Artist, **filters)
+
+
+def search_query(model, search_term):
+    # Every whitespace-separated token must appear somewhere in the entity's
+    # search_text (name, city/state, genres); LIKE '%token%' is served by the
+    # pg_trgm GIN index. Matches are ranked by how well the whole term fits.
+    term = search_term.lower()
+    query = db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+        db.func.count().over().label('total'),
+    )
+    for token in term.split():
+        query = query.filter(model.search_text.contains(token, autoescape=True))
+    return query.order_by(
+        db.func.word_similarity(term, model.search_text).desc(),
+        db.func.similarity(db.func.lower(model.name), term).desc(),
+        model.name,
+        model.id,
+    )
+
+
+def venue_search_query(search_term):
+    return search_query(Venue, search_term)
+
+
+def artist_search_query(search_term):
+    return search_query(Artist, search_term)
+
+
+def venue_shows_query(venue_id):
+    return (
+        db.session.query(Show, Artist)
+        .join(Artist, Show.artist_id == Artist.id)
+        .filter(Show.venue_id == venue_id)
+    )
+
+
+def artist_shows_query(artist_id):
+    return (
+        db.session.query(Show, Venue)
+        .join(Venue, Show.venue_id == Venue.id)
+        .filter(Show.artist_id == artist_id)
+    )
+
+
+def _upcoming_or_past(upcoming, now):
+    return Show.start_time > now if upcoming else Show.start_time <= now
+
+
+def venue_shows_statement(venue_id, upcoming, now):
+    # Column-only variant of venue_shows_query for the async detail view.
+    return (
+        db.select(
+            Artist.id.label('artist_id'),
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            Show.start_time,
+        )
+        .join(Artist, Show.artist_id == Artist.id)
+        .where(Show.venue_id == venue_id, _upcoming_or_past(upcoming, now))
+        .order_by(Show.start_time)
+    )
+
+
+def artist_shows_statement(artist_id, upcoming, now):
+    return (
+        db.select(
+            Venue.id.label('venue_id'),
+            Venue.name.label('venue_name'),
+            Venue.image_link.label('venue_image_link'),
+            Show.start_time,
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .where(Show.artist_id == artist_id, _upcoming_or_past(upcoming, now))
+        .order_by(Show.start_time)
+    )
+
+
+def artist_ids_for_venue(venue_id):
+    return [
+        artist_id for artist_id, in
+        db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+    ]
+
+
+def venue_ids_for_artist(artist_id):
+    return [
+        venue_id for venue_id, in
+        db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+    ]
+
+
+def show_listing_query(start=None, end=None):
+    # Bounds on start_time let Postgres prune "Show" to the months in range.
+    query = (
+        db.session.query(Show, Venue, Artist)
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+        .order_by(Show.start_time)
+    )
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    return query
@@ -0,0 +1,107 @@
+#----------------------------------------------------------------------------#
+# Read replica routing
+#----------------------------------------------------------------------------#
+
+# Views decorated with @read_replica run their queries against one of the
+# DB_REPLICA_URLS engines (bound as replica_0, replica_1, ...), picked per
+# request by DB_REPLICA_SELECTION. Everything else, and every flush, goes to
+# the primary. A user who has just written is kept on the primary for
+# DB_READ_YOUR_WRITES_SECONDS so they see their own change despite replica lag.
+
+import functools
+import inspect
+import itertools
+import time
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.expression import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+_round_robin = itertools.count()
+
+
+def init_app(app):
+    # Runs before db.init_app(), so the binds follow the app's own
+    # DB_REPLICA_URLS rather than the environment config.py was imported in.
+    # Flask-SQLAlchemy applies SQLALCHEMY_ENGINE_OPTIONS to the primary only,
+    # so each replica is given the same pool settings explicitly.
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.update({
+        f'{REPLICA_BIND_PREFIX}{i}': {**options, 'url': url}
+        for i, url in enumerate(app.config['DB_REPLICA_URLS'])
+    })
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def replica_engines(db):
+    return [engine for key, engine in sorted(db.engines.items(), key=lambda item: str(item[0]))
+            if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+
+def _checked_out(engine):
+    pool = engine.pool
+    return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+
+def choose_replica(engines, selection):
+    if not engines:
+        return None
+    if selection == 'least_connections':
+        # Ties (e.g. NullPool behind PgBouncer) fall back to round-robin order.
+        start = next(_round_robin)
+        rotated = engines[start % len(engines):] + engines[:start % len(engines)]
+        return min(rotated, key=_checked_out)
+    return engines[next(_round_robin) % len(engines)]
+
+
+def _recent_write():
+    return session.get('primary_until', 0) > time.time()
+
+
+def _use_replica():
+    if not _recent_write():
+        db = current_app.extensions['sqlalchemy']
+        g.replica_engine = choose_replica(
+            replica_engines(db), current_app.config['DB_REPLICA_SELECTION']
+        )
+
+
+def read_replica(view):
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            _use_replica()
+            return await view(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        _use_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            engine = g.get('replica_engine') if has_request_context() else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def stick_to_primary():
+    # For writes that never flush, such as a Core insert run through
+    # db.session.execute(); ORM writes are covered by the listener below.
+    if has_request_context():
+        session['primary_until'] = time.time() + current_app.config['DB_READ_YOUR_WRITES_SECONDS']
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _stick_to_primary(db_session, flush_context):
+    stick_to_primary()
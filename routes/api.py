@@ -0,0 +1,205 @@
+#----------------------------------------------------------------------------#
+# JSON API routes
+#----------------------------------------------------------------------------#
+
+# Read-only feeds. Rows are streamed from a server-side cursor (yield_per) and
+# serialized one at a time, so memory stays flat whatever the result size.
+# ?format=ndjson (or Accept: application/x-ndjson) emits one object per line;
+# otherwise the response is a single JSON document.
+
+import hmac
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+
+from exporter import EXPORTS, FORMATS, export_chunks, json_default, stream_rows
+from extensions import db
+from models import Venue, Artist, Show
+from queries import filter_listing, listing_filters
+from replicas import read_replica
+from suggest import SUGGEST_MODELS, suggest_index
+
+bp = Blueprint('api', __name__)
+
+NDJSON = 'application/x-ndjson'
+
+
+def _dumps(obj):
+    return json.dumps(obj, default=json_default, separators=(',', ':'))
+
+
+def _wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON
+
+
+def _stream(rows, header=None):
+    # With a header the JSON document is the header object plus a "shows"
+    # list of rows; in NDJSON the header is the first line.
+    ndjson = _wants_ndjson()
+
+    def generate():
+        if ndjson:
+            if header is not None:
+                yield _dumps(header) + '\n'
+            for row in rows:
+                yield _dumps(row) + '\n'
+            return
+        yield '[' if header is None else _dumps(header)[:-1] + ',"shows":['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + _dumps(row)
+        yield ']' if header is None else ']}'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=NDJSON if ndjson else 'application/json',
+    )
+
+
+def _show_statement():
+    statement = (
+        db.select(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label('venue_name'),
+            Show.artist_id,
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+    )
+    venue_id = request.args.get('venue_id', type=int)
+    if venue_id is not None:
+        statement = statement.where(Show.venue_id == venue_id)
+    artist_id = request.args.get('artist_id', type=int)
+    if artist_id is not None:
+        statement = statement.where(Show.artist_id == artist_id)
+    upcoming = request.args.get('upcoming')
+    if upcoming in ('true', 'false'):
+        now = datetime.utcnow()
+        statement = statement.where(
+            Show.start_time > now if upcoming == 'true' else Show.start_time <= now
+        )
+    return statement.order_by(Show.start_time, Show.id)
+
+
+def _entity_statement(model, *columns):
+    statement = db.select(
+        model.id,
+        model.name,
+        model.city,
+        model.state,
+        *columns,
+        model.genres,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+    )
+    # Same matching as /venues/search and /artists/search.
+    for token in request.args.get('q', '').lower().split():
+        statement = statement.where(model.search_text.contains(token, autoescape=True))
+    return filter_listing(statement, model, **listing_filters(request.args))
+
+
+@bp.route('/api/shows')
+@read_replica
+def api_shows():
+    return _stream(stream_rows(_show_statement()))
+
+
+@bp.route('/api/venues')
+@read_replica
+def api_venues():
+    statement = _entity_statement(Venue, Venue.address).order_by(
+        Venue.state, Venue.city, Venue.id
+    )
+    return _stream(stream_rows(statement))
+
+
+@bp.route('/api/artists')
+@read_replica
+def api_artists():
+    statement = _entity_statement(Artist).order_by(Artist.id)
+    return _stream(stream_rows(statement))
+
+
+def _detail(model, fk_column, entity_id):
+    entity = db.session.get(model, entity_id)
+    if entity is None:
+        abort(404)
+    header = {
+        "id": entity.id,
+        "name": entity.name,
+        "genres": entity.genres,
+        "city": entity.city,
+        "state": entity.state,
+        "phone": entity.phone,
+        "website": entity.website_link,
+        "facebook_link": entity.facebook_link,
+        "seeking_description": entity.seeking_description,
+        "image_link": entity.image_link,
+        "past_shows_count": entity.past_shows_count,
+        "upcoming_shows_count": entity.upcoming_shows_count,
+    }
+    statement = _show_statement().where(fk_column == entity_id)
+    return _stream(stream_rows(statement), header)
+
+
+@bp.route('/api/venues/<int:venue_id>')
+@read_replica
+def api_venue(venue_id):
+    return _detail(Venue, Show.venue_id, venue_id)
+
+
+@bp.route('/api/artists/<int:artist_id>')
+@read_replica
+def api_artist(artist_id):
+    return _detail(Artist, Show.artist_id, artist_id)
+
+
+@bp.route('/api/suggest')
+@read_replica
+def api_suggest():
+    # Typeahead: ?type=venue|artist&q=<prefix of any word in the name>.
+    kind = request.args.get('type')
+    if kind not in SUGGEST_MODELS:
+        abort(400)
+    limit = min(request.args.get('limit', 10, type=int), current_app.config['SUGGEST_MAX_RESULTS'])
+    results = suggest_index(kind).search(request.args.get('q', ''), max(limit, 0))
+    return jsonify({"data": results})
+
+
+def _authorized():
+    token = current_app.config['EXPORT_API_TOKEN']
+    if not token:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+
+
+@bp.route('/api/export/<kind>')
+@read_replica
+def api_export(kind):
+    # Bulk snapshot for analysts; see exporter.py. Disabled unless
+    # EXPORT_API_TOKEN is set, and then requires "Authorization: Bearer <token>".
+    if not _authorized():
+        abort(403 if current_app.config['EXPORT_API_TOKEN'] else 404)
+    format = request.args.get('format', 'csv')
+    if kind not in EXPORTS or format not in FORMATS:
+        abort(404)
+    since = None
+    if request.args.get('since'):
+        try:
+            since = datetime.fromisoformat(request.args['since'])
+        except ValueError:
+            abort(400)
+    gzip = request.args.get('gzip') in ('1', 'true')
+    filename = f'{kind}.{format}' + ('.gz' if gzip else '')
+    mimetype = 'application/gzip' if gzip else ('text/csv' if format == 'csv' else NDJSON)
+    return Response(
+        stream_with_context(export_chunks(kind, format, since, gzip)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
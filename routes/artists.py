@@ -3,55 +3,62 @@
 #----------------------------------------------------------------------------#
 
 from datetime import datetime
+from functools import partial
 
-from flask import render_template, request, flash, redirect, url_for
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, flash, redirect, url_for
 
-from extensions import app, db
+from async_db import fetch_all
+from cache import get_page, render_page, invalidate, artist_key
+from conditional import conditional, listing_validator, artist_validator
+from counters import past_shows_count
+from extensions import db
 from forms import ArtistForm
-from models import Artist, Show, Venue
+from models import Artist, Show
+from pagination import keyset_page, decode_cursor
+from queries import listing_filters, venue_ids_for_artist, artist_listing_query, artist_search_query, artist_shows_query, artist_shows_statement
+from replicas import read_replica
+from soft_delete import delete_entity
+from suggest import index_entity, unindex_entity
 
+bp = Blueprint('artists', __name__)
 
-@app.route('/artists')
+
+@bp.route('/artists')
+@read_replica
+@conditional(partial(listing_validator, Artist))
 def artists():
-    artists = (
-        db.session.query(Artist.id, Artist.name)
-        .order_by(Artist.id)
-        .all()
+    filters = listing_filters(request.args)
+    page = keyset_page(
+        artist_listing_query(**filters),
+        (Artist.id,),
+        lambda row: (row.id,),
+        current_app.config['PAGE_SIZE'],
+        after=decode_cursor(request.args.get('after'), (int,)),
+        before=decode_cursor(request.args.get('before'), (int,)),
     )
     data = [
         {"id": artist.id, "name": artist.name}
-        for artist in artists
+        for artist in page.items
     ]
-    return render_template('pages/artists.html', artists=data)
+    return render_template('pages/artists.html', artists=data, page=page, filters=filters)
 
 
-@app.route('/artists/search', methods=['POST'])
+@bp.route('/artists/search', methods=['POST'])
+@read_replica
 def search_artists():
     # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
     search_term = request.form.get('search_term', '').strip()
-    now = datetime.utcnow()
-    upcoming_counts = (
-        db.session.query(
-            Show.artist_id,
-            db.func.count(Show.id).label('num_upcoming_shows'),
-        )
-        .filter(Show.start_time > now)
-        .group_by(Show.artist_id)
-        .subquery()
-    )
+    limit = request.form.get('limit', current_app.config['SEARCH_RESULTS_LIMIT'], type=int)
+    offset = request.form.get('offset', 0, type=int)
     artists = (
-        db.session.query(
-            Artist.id,
-            Artist.name,
-            db.func.coalesce(upcoming_counts.c.num_upcoming_shows, 0).label('num_upcoming_shows'),
-        )
-        .outerjoin(upcoming_counts, Artist.id == upcoming_counts.c.artist_id)
-        .filter(db.func.lower(Artist.name).like(f"%{search_term.lower()}%"))
+        artist_search_query(search_term)
+        .limit(limit)
+        .offset(offset)
         .all()
     )
     response = {
-        "count": len(artists),
+        "count": artists[0].total if artists else 0,
         "data": [
             {
                 "id": artist.id,
@@ -64,42 +71,13 @@ def search_artists():
     return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
 
 
-@app.route('/artists/<int:artist_id>')
-def show_artist(artist_id):
-    # shows the artist page with the given artist_id
-    artist = Artist.query.get(artist_id)
-    now = datetime.utcnow()
-    genres = artist.genres or []
-    if isinstance(genres, (list, tuple)):
-        if genres and all(isinstance(g, str) and len(g) == 1 for g in genres):
-            genres = "".join(genres)
-        elif len(genres) == 1 and isinstance(genres[0], str):
-            genres = genres[0]
-    if isinstance(genres, str):
-        genres = [g.strip() for g in genres.strip("{}").split(",") if g.strip()]
-    shows = (
-        db.session.query(Show, Venue)
-        .join(Venue, Show.venue_id == Venue.id)
-        .filter(Show.artist_id == artist_id)
-        .all()
-    )
-    past_shows = []
-    upcoming_shows = []
-    for show, venue in shows:
-        show_data = {
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "venue_image_link": venue.image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        if show.start_time > now:
-            upcoming_shows.append(show_data)
-        else:
-            past_shows.append(show_data)
+def _render_artist(artist, upcoming_shows):
+    # artist is an Artist or, from the async view, a row of its columns. Past
+    # shows are only counted here; the page loads them from artist_past_shows.
     data = {
         "id": artist.id,
         "name": artist.name,
-        "genres": genres,
+        "genres": artist.genres,
         "city": artist.city,
         "state": artist.state,
         "phone": artist.phone,
@@ -108,18 +86,93 @@ def show_artist(artist_id):
         "seeking_venue": artist.seeking_venue,
         "seeking_description": artist.seeking_description,
         "image_link": artist.image_link,
-        "past_shows": past_shows,
         "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
+        "past_shows_count": past_shows_count(artist, len(upcoming_shows)),
         "upcoming_shows_count": len(upcoming_shows),
     }
-    return render_template('pages/show_artist.html', artist=data)
+    return render_page(artist_key(artist.id), 'pages/show_artist.html', artist.next_show_at, artist=data)
+
+
+@bp.route('/artists/<int:artist_id>')
+@read_replica
+@conditional(artist_validator)
+def show_artist(artist_id):
+    # shows the artist page with the given artist_id
+    key = artist_key(artist_id)
+    html = get_page(key)
+    if html is not None:
+        return html
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        abort(404)
+    upcoming = db.session.execute(artist_shows_statement(artist_id, True, datetime.utcnow()))
+    return _render_artist(artist, [show._asdict() for show in upcoming])
+
+
+@read_replica
+@conditional(artist_validator)
+async def show_artist_async(artist_id):
+    # Same page as show_artist, with the artist and its upcoming shows
+    # fetched concurrently (DB_ASYNC_DETAIL_PAGES).
+    html = get_page(artist_key(artist_id))
+    if html is not None:
+        return html
+    artists, upcoming = await fetch_all(
+        db.select(Artist.__table__).where(Artist.id == artist_id, Artist.deleted_at.is_(None)),
+        artist_shows_statement(artist_id, True, datetime.utcnow()),
+    )
+    if not artists:
+        abort(404)
+    return _render_artist(artists[0], [show._asdict() for show in upcoming])
+
+
+@bp.route('/artists/<int:artist_id>/past-shows')
+@read_replica
+@conditional(artist_validator)
+def artist_past_shows(artist_id):
+    # One page of past shows, newest first: an HTML fragment of tiles for the
+    # artist page, or JSON with ?format=json.
+    if db.session.get(Artist, artist_id) is None:
+        abort(404)
+    cursor_types = (datetime.fromisoformat, int)
+    page = keyset_page(
+        artist_shows_query(artist_id).filter(Show.start_time <= datetime.utcnow()),
+        (Show.start_time, Show.id),
+        lambda row: (row.Show.start_time, row.Show.id),
+        current_app.config['PAST_SHOWS_PAGE_SIZE'],
+        after=decode_cursor(request.args.get('after'), cursor_types),
+        descending=True,
+    )
+    shows = [
+        {
+            "venue_id": venue.id,
+            "venue_name": venue.name,
+            "venue_image_link": venue.image_link,
+            "start_time": show.start_time,
+        }
+        for show, venue in page.items
+    ]
+    next_url = page.next_cursor and url_for(
+        'artists.artist_past_shows', artist_id=artist_id, after=page.next_cursor,
+        format=request.args.get('format'),
+    )
+    if request.args.get('format') == 'json':
+        for show in shows:
+            show["start_time"] = show["start_time"].isoformat()
+        return jsonify({"data": shows, "next": next_url})
+    return render_template('pages/past_shows.html', shows=shows, tile='venue', next_url=next_url)
+
+
+@bp.record
+def _use_async_detail(state):
+    if state.app.config['DB_ASYNC_DETAIL_PAGES']:
+        state.app.view_functions['artists.show_artist'] = show_artist_async
 
 
 #  Update
 #  ----------------------------------------------------------------
 
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
     form = ArtistForm()
     artist = Artist.query.get(artist_id)
@@ -137,9 +190,12 @@ def edit_artist(artist_id):
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
     artist = Artist.query.get(artist_id)
+    # The artist's name and image also appear on the pages of every venue it
+    # shares a show with.
+    venue_ids = venue_ids_for_artist(artist_id)
     if artist:
         artist.name = request.form['name']
         artist.city = request.form['city']
@@ -153,24 +209,27 @@ def edit_artist_submission(artist_id):
         artist.seeking_description = request.form.get('seeking_description') or None
     try:
         db.session.commit()
+        invalidate(artist_ids=[artist_id], venue_ids=venue_ids)
+        if artist:
+            index_entity('artist', artist)
         flash('Artist ' + request.form['name'] + ' was successfully updated!')
     except Exception:
         db.session.rollback()
         flash('An error occurred. Artist ' + request.form['name'] + ' could not be updated.')
 
-    return redirect(url_for('show_artist', artist_id=artist_id))
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
 
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@bp.route('/artists/create', methods=['GET'])
 def create_artist_form():
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
 
-@app.route('/artists/create', methods=['POST'])
+@bp.route('/artists/create', methods=['POST'])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     artist = Artist(
@@ -189,8 +248,28 @@ def create_artist_submission():
     try:
         db.session.add(artist)
         db.session.commit()
+        index_entity('artist', artist)
         flash('Artist ' + request.form['name'] + ' was successfully listed!')
     except Exception:
         db.session.rollback()
         flash('An error occurred. Artist ' + data.name + ' could not be listed.')
     return render_template('pages/home.html')
+
+
+@bp.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    try:
+        artist = Artist.query.get(artist_id)
+        if artist:
+            venue_ids = venue_ids_for_artist(artist_id)
+            delete_entity(artist)
+            db.session.commit()
+            invalidate(artist_ids=[artist_id], venue_ids=venue_ids)
+            unindex_entity('artist', artist_id)
+            flash('Artist was successfully deleted!')
+        else:
+            flash('Artist not found.')
+    except Exception:
+        db.session.rollback()
+        flash('An error occurred. Artist could not be deleted.')
+    return redirect(url_for('main.index'))
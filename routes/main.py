@@ -2,11 +2,25 @@
 # Main routes
 #----------------------------------------------------------------------------#
 
-from flask import render_template
+from flask import Blueprint, abort, current_app, jsonify, render_template
 
-from extensions import app
+from extensions import db
+from pooling import pool_stats
 
+bp = Blueprint('main', __name__)
 
-@app.route('/')
+
+@bp.route('/')
 def index():
     return render_template('pages/home.html')
+
+
+@bp.route('/metrics/pool')
+def pool_metrics():
+    # Checked-out/overflow connections and checkout wait times, for scraping:
+    # one entry for the primary and one per read replica, each sized apart.
+    if not current_app.config['POOL_METRICS_ENABLED']:
+        abort(404)
+    engines = {'primary': db.engine}
+    engines.update((key, engine) for key, engine in db.engines.items() if key)
+    return jsonify({key: pool_stats(engine) for key, engine in engines.items()})
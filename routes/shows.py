@@ -2,24 +2,57 @@
 # Show routes
 #----------------------------------------------------------------------------#
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 
-from flask import render_template, request, flash
+from flask import Blueprint, abort, current_app, flash, jsonify, render_template, request
 
-from extensions import app, db
+from cache import invalidate
+from conditional import conditional, listing_validator
+from extensions import db
 from forms import ShowForm
-from models import Show, Venue, Artist
+from models import Venue, Artist, Show
+from pagination import keyset_page, decode_cursor
+from queries import show_listing_query
+from replicas import read_replica
+from scheduling import schedule_shows
 
+bp = Blueprint('shows', __name__)
 
-@app.route('/shows')
+
+def _show_range():
+    # ?from=&to= as ISO dates or datetimes; a plain `to` date includes that
+    # day. Returns the query bounds and the arguments for the pager links.
+    bounds = {}
+    args = {}
+    for name, bound in (('from', 'start'), ('to', 'end')):
+        value = request.args.get(name)
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            abort(400)
+        if name == 'to' and len(value) == 10:
+            parsed += timedelta(days=1)
+        bounds[bound] = parsed
+        args[name] = value
+    return bounds, args
+
+
+@bp.route('/shows')
+@read_replica
+@conditional(partial(listing_validator, Show, Venue, Artist))
 def shows():
     # displays list of shows at /shows
-    shows = (
-        db.session.query(Show, Venue, Artist)
-        .join(Venue, Show.venue_id == Venue.id)
-        .join(Artist, Show.artist_id == Artist.id)
-        .order_by(Show.start_time)
-        .all()
+    bounds, range_args = _show_range()
+    page = keyset_page(
+        show_listing_query(**bounds),
+        (Show.start_time, Show.id),
+        lambda row: (row.Show.start_time, row.Show.id),
+        current_app.config['PAGE_SIZE'],
+        after=decode_cursor(request.args.get('after'), (datetime.fromisoformat, int)),
+        before=decode_cursor(request.args.get('before'), (datetime.fromisoformat, int)),
     )
     data = [
         {
@@ -28,49 +61,113 @@ def shows():
             "artist_id": artist.id,
             "artist_name": artist.name,
             "artist_image_link": artist.image_link,
-            "start_time": show.start_time.isoformat(),
+            "start_time": show.start_time,
         }
-        for show, venue, artist in shows
+        for show, venue, artist in page.items
     ]
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows.html', shows=data, page=page, range_args=range_args)
 
 
-@app.route('/shows/create')
+@bp.route('/shows/create')
 def create_shows():
     # renders form. do not touch.
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
 
-@app.route('/shows/create', methods=['POST'])
+@bp.route('/shows/create', methods=['POST'])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
-    start_time_raw = request.form.get('start_time', '').strip()
-    try:
-        if "T" in start_time_raw:
-            start_time = datetime.fromisoformat(start_time_raw)
-        else:
-            try:
-                start_time = datetime.strptime(start_time_raw, "%Y-%m-%d %H:%M")
-            except ValueError:
-                start_time = datetime.strptime(start_time_raw, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        flash('An error occurred. Show could not be listed.')
+    if not (request.form.get('artist_id', '').isdigit() and request.form.get('venue_id', '').isdigit()):
+        # The ids are filled in by picking a typeahead suggestion.
+        flash('An error occurred. Pick the artist and the venue from the suggestions.')
         return render_template('pages/home.html')
-    show = Show(
-        artist_id=request.form['artist_id'],
-        venue_id=request.form['venue_id'],
-        start_time=start_time,
-    )
-    data = show
     try:
-        db.session.add(show)
-        db.session.commit()
+        result, = schedule_shows([request.form])
     except Exception:
         db.session.rollback()
         flash('An error occurred. Show could not be listed.')
         return render_template('pages/home.html')
+    if result['errors']:
+        flash('An error occurred. Show could not be listed: ' + '; '.join(result['errors']) + '.')
+        return render_template('pages/home.html')
+    invalidate(venue_ids=[result['venue_id']], artist_ids=[result['artist_id']])
 
     # on successful db insert, flash success
     flash('Show was successfully listed!')
     return render_template('pages/home.html')
+
+
+#  Batch scheduling
+#  ----------------------------------------------------------------
+
+@bp.route('/shows/batch', methods=['GET'])
+def create_show_batch_form():
+    form = ShowForm()
+    return render_template('forms/new_show_batch.html', form=form, rows=[{}], results=None)
+
+
+def _batch_rows():
+    # JSON: {"shows": [{"artist_id", "venue_id", "start_time"}, ...],
+    # "partial": false}. The form books one artist at several venues.
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict) or not isinstance(payload.get('shows'), list):
+            abort(400)
+        if not all(isinstance(row, dict) for row in payload['shows']):
+            abort(400)
+        return payload['shows'], bool(payload.get('partial'))
+    artist_id = request.form.get('artist_id', '')
+    rows = [
+        {'artist_id': artist_id, 'venue_name': name, 'venue_id': venue_id, 'start_time': start_time}
+        for name, venue_id, start_time in zip(
+            request.form.getlist('venue_name'),
+            request.form.getlist('venue_id'),
+            request.form.getlist('start_time'),
+        )
+        if venue_id or start_time
+    ]
+    return rows, bool(request.form.get('partial'))
+
+
+@bp.route('/shows/batch', methods=['POST'])
+def create_show_batch_submission():
+    rows, allow_partial = _batch_rows()
+    if len(rows) > current_app.config['SHOW_BATCH_MAX_ROWS']:
+        abort(413)
+    try:
+        results = schedule_shows(rows, partial=allow_partial)
+    except Exception:
+        db.session.rollback()
+        if request.is_json:
+            raise
+        flash('An error occurred. Shows could not be listed.')
+        return render_template('forms/new_show_batch.html', form=ShowForm(request.form), rows=rows or [{}], results=None)
+    created = [result for result in results if 'id' in result]
+    invalidate(
+        venue_ids={result['venue_id'] for result in created},
+        artist_ids={result['artist_id'] for result in created},
+    )
+    if request.is_json:
+        status = 201 if len(created) == len(results) else 200 if created else 422
+        return jsonify({
+            "created": len(created),
+            "results": [
+                {"row": result['row'], "id": result.get('id'), "errors": result['errors']}
+                for result in results
+            ],
+        }), status
+    if created:
+        flash(f'{len(created)} of {len(results)} shows were successfully listed!')
+    else:
+        flash('An error occurred. No shows were listed; fix the rows below and try again.')
+    # Show the rows that were not created, with their errors, to fix and resend.
+    remaining = [(row, result) for row, result in zip(rows, results) if 'id' not in result]
+    if not remaining:
+        return render_template('pages/home.html')
+    return render_template(
+        'forms/new_show_batch.html',
+        form=ShowForm(request.form),
+        rows=[row for row, _ in remaining],
+        results=[result for _, result in remaining],
+    )
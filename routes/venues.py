@@ -3,39 +3,41 @@
 #----------------------------------------------------------------------------#
 
 from datetime import datetime
+from functools import partial
 
-from flask import render_template, request, flash, redirect, url_for
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, flash, redirect, url_for
 
-from extensions import app, db
+from async_db import fetch_all
+from cache import get_page, render_page, invalidate, venue_key
+from conditional import conditional, listing_validator, venue_validator
+from counters import past_shows_count
+from extensions import db
 from forms import VenueForm
-from models import Venue, Show, Artist
+from models import Venue, Show
+from pagination import keyset_page, decode_cursor
+from queries import listing_filters, artist_ids_for_venue, venue_listing_query, venue_search_query, venue_shows_query, venue_shows_statement
+from replicas import read_replica
+from soft_delete import delete_entity
+from suggest import index_entity, unindex_entity
 
+bp = Blueprint('venues', __name__)
 
-@app.route('/venues')
+
+@bp.route('/venues')
+@read_replica
+@conditional(partial(listing_validator, Venue))
 def venues():
-    now = datetime.utcnow()
-    upcoming_counts = (
-        db.session.query(
-            Show.venue_id,
-            db.func.count(Show.id).label('num_upcoming_shows'),
-        )
-        .filter(Show.start_time > now)
-        .group_by(Show.venue_id)
-        .subquery()
-    )
-    venues_with_counts = (
-        db.session.query(
-            Venue.id,
-            Venue.name,
-            Venue.city,
-            Venue.state,
-            db.func.coalesce(upcoming_counts.c.num_upcoming_shows, 0).label('num_upcoming_shows'),
-        )
-        .outerjoin(upcoming_counts, Venue.id == upcoming_counts.c.venue_id)
-        .all()
+    filters = listing_filters(request.args)
+    page = keyset_page(
+        venue_listing_query(**filters),
+        (Venue.state, Venue.city, Venue.id),
+        lambda row: (row.state, row.city, row.id),
+        current_app.config['PAGE_SIZE'],
+        after=decode_cursor(request.args.get('after'), (str, str, int)),
+        before=decode_cursor(request.args.get('before'), (str, str, int)),
     )
     areas = {}
-    for venue in venues_with_counts:
+    for venue in page.items:
         key = (venue.city, venue.state)
         area = areas.get(key)
         if area is None:
@@ -47,36 +49,25 @@ def venues():
             "num_upcoming_shows": venue.num_upcoming_shows,
         })
     data = list(areas.values())
-    return render_template('pages/venues.html', areas=data)
+    return render_template('pages/venues.html', areas=data, page=page, filters=filters)
 
 
-@app.route('/venues/search', methods=['POST'])
+@bp.route('/venues/search', methods=['POST'])
+@read_replica
 def search_venues():
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     search_term = request.form.get('search_term', '').strip()
-    now = datetime.utcnow()
-    upcoming_counts = (
-        db.session.query(
-            Show.venue_id,
-            db.func.count(Show.id).label('num_upcoming_shows'),
-        )
-        .filter(Show.start_time > now)
-        .group_by(Show.venue_id)
-        .subquery()
-    )
+    limit = request.form.get('limit', current_app.config['SEARCH_RESULTS_LIMIT'], type=int)
+    offset = request.form.get('offset', 0, type=int)
     venues = (
-        db.session.query(
-            Venue.id,
-            Venue.name,
-            db.func.coalesce(upcoming_counts.c.num_upcoming_shows, 0).label('num_upcoming_shows'),
-        )
-        .outerjoin(upcoming_counts, Venue.id == upcoming_counts.c.venue_id)
-        .filter(db.func.lower(Venue.name).like(f"%{search_term.lower()}%"))
+        venue_search_query(search_term)
+        .limit(limit)
+        .offset(offset)
         .all()
     )
     response = {
-        "count": len(venues),
+        "count": venues[0].total if venues else 0,
         "data": [
             {
                 "id": venue.id,
@@ -89,42 +80,13 @@ def search_venues():
     return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
 
 
-@app.route('/venues/<int:venue_id>')
-def show_venue(venue_id):
-    # shows the venue page with the given venue_id
-    venue = Venue.query.get(venue_id)
-    now = datetime.utcnow()
-    genres = venue.genres or []
-    if isinstance(genres, (list, tuple)):
-        if genres and all(isinstance(g, str) and len(g) == 1 for g in genres):
-            genres = "".join(genres)
-        elif len(genres) == 1 and isinstance(genres[0], str):
-            genres = genres[0]
-    if isinstance(genres, str):
-        genres = [g.strip() for g in genres.strip("{}").split(",") if g.strip()]
-    shows = (
-        db.session.query(Show, Artist)
-        .join(Artist, Show.artist_id == Artist.id)
-        .filter(Show.venue_id == venue_id)
-        .all()
-    )
-    past_shows = []
-    upcoming_shows = []
-    for show, artist in shows:
-        show_data = {
-            "artist_id": artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        if show.start_time > now:
-            upcoming_shows.append(show_data)
-        else:
-            past_shows.append(show_data)
+def _render_venue(venue, upcoming_shows):
+    # venue is a Venue or, from the async view, a row of its columns. Past
+    # shows are only counted here; the page loads them from venue_past_shows.
     data = {
         "id": venue.id,
         "name": venue.name,
-        "genres": genres,
+        "genres": venue.genres,
         "address": venue.address,
         "city": venue.city,
         "state": venue.state,
@@ -134,24 +96,99 @@ def show_venue(venue_id):
         "seeking_talent": venue.seeking_talent,
         "seeking_description": venue.seeking_description,
         "image_link": venue.image_link,
-        "past_shows": past_shows,
         "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
+        "past_shows_count": past_shows_count(venue, len(upcoming_shows)),
         "upcoming_shows_count": len(upcoming_shows),
     }
-    return render_template('pages/show_venue.html', venue=data)
+    return render_page(venue_key(venue.id), 'pages/show_venue.html', venue.next_show_at, venue=data)
+
+
+@bp.route('/venues/<int:venue_id>')
+@read_replica
+@conditional(venue_validator)
+def show_venue(venue_id):
+    # shows the venue page with the given venue_id
+    key = venue_key(venue_id)
+    html = get_page(key)
+    if html is not None:
+        return html
+    venue = Venue.query.get(venue_id)
+    if venue is None:
+        abort(404)
+    upcoming = db.session.execute(venue_shows_statement(venue_id, True, datetime.utcnow()))
+    return _render_venue(venue, [show._asdict() for show in upcoming])
+
+
+@read_replica
+@conditional(venue_validator)
+async def show_venue_async(venue_id):
+    # Same page as show_venue, with the venue and its upcoming shows fetched
+    # concurrently (DB_ASYNC_DETAIL_PAGES).
+    html = get_page(venue_key(venue_id))
+    if html is not None:
+        return html
+    venues, upcoming = await fetch_all(
+        db.select(Venue.__table__).where(Venue.id == venue_id, Venue.deleted_at.is_(None)),
+        venue_shows_statement(venue_id, True, datetime.utcnow()),
+    )
+    if not venues:
+        abort(404)
+    return _render_venue(venues[0], [show._asdict() for show in upcoming])
+
+
+@bp.route('/venues/<int:venue_id>/past-shows')
+@read_replica
+@conditional(venue_validator)
+def venue_past_shows(venue_id):
+    # One page of past shows, newest first: an HTML fragment of tiles for the
+    # venue page, or JSON with ?format=json.
+    if db.session.get(Venue, venue_id) is None:
+        abort(404)
+    cursor_types = (datetime.fromisoformat, int)
+    page = keyset_page(
+        venue_shows_query(venue_id).filter(Show.start_time <= datetime.utcnow()),
+        (Show.start_time, Show.id),
+        lambda row: (row.Show.start_time, row.Show.id),
+        current_app.config['PAST_SHOWS_PAGE_SIZE'],
+        after=decode_cursor(request.args.get('after'), cursor_types),
+        descending=True,
+    )
+    shows = [
+        {
+            "artist_id": artist.id,
+            "artist_name": artist.name,
+            "artist_image_link": artist.image_link,
+            "start_time": show.start_time,
+        }
+        for show, artist in page.items
+    ]
+    next_url = page.next_cursor and url_for(
+        'venues.venue_past_shows', venue_id=venue_id, after=page.next_cursor,
+        format=request.args.get('format'),
+    )
+    if request.args.get('format') == 'json':
+        for show in shows:
+            show["start_time"] = show["start_time"].isoformat()
+        return jsonify({"data": shows, "next": next_url})
+    return render_template('pages/past_shows.html', shows=shows, tile='artist', next_url=next_url)
+
+
+@bp.record
+def _use_async_detail(state):
+    if state.app.config['DB_ASYNC_DETAIL_PAGES']:
+        state.app.view_functions['venues.show_venue'] = show_venue_async
 
 
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@bp.route('/venues/create', methods=['GET'])
 def create_venue_form():
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/create', methods=['POST'])
+@bp.route('/venues/create', methods=['POST'])
 def create_venue_submission():
     venue = Venue(
         name=request.form['name'],
@@ -170,6 +207,7 @@ def create_venue_submission():
     try:
         db.session.add(venue)
         db.session.commit()
+        index_entity('venue', venue)
         flash('Venue ' + request.form['name'] + ' was successfully listed!')
     except Exception:
         db.session.rollback()
@@ -177,7 +215,7 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
     form = VenueForm()
     venue = Venue.query.get(venue_id)
@@ -196,9 +234,12 @@ def edit_venue(venue_id):
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
     venue = Venue.query.get(venue_id)
+    # The venue's name and image also appear on the pages of every artist it
+    # shares a show with.
+    artist_ids = artist_ids_for_venue(venue_id)
     if venue:
         venue.name = request.form['name']
         venue.city = request.form['city']
@@ -213,24 +254,31 @@ def edit_venue_submission(venue_id):
         venue.seeking_description = request.form.get('seeking_description') or None
     try:
         db.session.commit()
+        invalidate(venue_ids=[venue_id], artist_ids=artist_ids)
+        if venue:
+            index_entity('venue', venue)
         flash('Venue ' + request.form['name'] + ' was successfully updated!')
     except Exception:
         db.session.rollback()
         flash('An error occurred. Venue ' + request.form['name'] + ' could not be updated.')
-    return redirect(url_for('show_venue', venue_id=venue_id))
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     try:
         venue = Venue.query.get(venue_id)
         if venue:
-            db.session.delete(venue)
+            deleted_id = venue.id
+            artist_ids = artist_ids_for_venue(deleted_id)
+            delete_entity(venue)
             db.session.commit()
+            invalidate(venue_ids=[deleted_id], artist_ids=artist_ids)
+            unindex_entity('venue', deleted_id)
             flash('Venue was successfully deleted!')
         else:
             flash('Venue not found.')
     except Exception:
         db.session.rollback()
         flash('An error occurred. Venue could not be deleted.')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Show scheduling
+#----------------------------------------------------------------------------#
+
+# Creates shows from (artist_id, venue_id, start_time) rows, one or a whole
+# tour at a time, in a single transaction:
+#   1. parse each row in Python;
+#   2. one statement checks that every venue and artist exists, taking a
+#      row lock on the venues (in id order) so concurrent bookings of the
+#      same venue queue up rather than both passing step 3;
+#   3. one statement finds existing shows at the same venue within
+#      SHOW_BOOKING_WINDOW_MINUTES of each row, a range scan of
+#      ix_Show_venue_id_start_time_id, and rows are also checked against each
+#      other;
+#   4. one multi-row INSERT ... RETURNING adds the valid rows.
+# By default a batch with any invalid row inserts nothing; with
+# partial=True the valid rows are inserted and the rest reported.
+
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from extensions import db
+from models import Venue, Artist, Show
+from replicas import stick_to_primary
+
+
+def parse_start_time(value):
+    # Start times are stored as naive UTC.
+    value = str(value or '').strip()
+    for parse in (
+        datetime.fromisoformat,
+        lambda v: datetime.strptime(v, "%Y-%m-%d %H:%M"),
+    ):
+        try:
+            parsed = parse(value)
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    return None
+
+
+def _parse_id(value):
+    value = str(value if value is not None else '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def _parse(number, row):
+    result = {'row': number, 'errors': []}
+    artist_id = _parse_id(row.get('artist_id'))
+    venue_id = _parse_id(row.get('venue_id'))
+    start_time = parse_start_time(row.get('start_time'))
+    if artist_id is None:
+        result['errors'].append('artist_id must be a number')
+    if venue_id is None:
+        result['errors'].append('venue_id must be a number')
+    if start_time is None:
+        result['errors'].append('start_time must look like YYYY-MM-DD HH:MM')
+    result.update(artist_id=artist_id, venue_id=venue_id, start_time=start_time)
+    return result
+
+
+def _check_references(results):
+    venue_ids = sorted({r['venue_id'] for r in results if r['venue_id'] is not None})
+    artist_ids = sorted({r['artist_id'] for r in results if r['artist_id'] is not None})
+    venues = (
+        db.select(Venue.id)
+        .where(Venue.id.in_(venue_ids))
+        .order_by(Venue.id)
+        .with_for_update(key_share=True)
+    )
+    artists = db.select(Artist.id).where(Artist.id.in_(artist_ids))
+    found_venues, found_artists = db.session.execute(
+        db.select(db.func.array(venues.scalar_subquery()), db.func.array(artists.scalar_subquery()))
+    ).one()
+    found_venues, found_artists = set(found_venues), set(found_artists)
+    for result in results:
+        if result['venue_id'] is not None and result['venue_id'] not in found_venues:
+            result['errors'].append(f'venue {result["venue_id"]} does not exist')
+        if result['artist_id'] is not None and result['artist_id'] not in found_artists:
+            result['errors'].append(f'artist {result["artist_id"]} does not exist')
+
+
+def _check_bookings(results, window):
+    candidates = [r for r in results if not r['errors']]
+    if not candidates:
+        return
+    requested = db.values(
+        db.column('position', db.Integer),
+        db.column('venue_id', db.Integer),
+        db.column('start_time', db.DateTime),
+        name='requested',
+    ).data([(r['row'], r['venue_id'], r['start_time']) for r in candidates])
+    clashes = db.session.execute(
+        db.select(requested.c.position, Show.id, Show.start_time)
+        .join(Show, db.and_(
+            Show.venue_id == requested.c.venue_id,
+            Show.start_time > requested.c.start_time - window,
+            Show.start_time < requested.c.start_time + window,
+        ))
+    ).all()
+    by_row = {r['row']: r for r in candidates}
+    for number, show_id, start_time in clashes:
+        by_row[number]['errors'].append(
+            f'venue already has show {show_id} at {start_time:%Y-%m-%d %H:%M}'
+        )
+    # Rows in the same batch that clash with each other: neighbours once
+    # sorted by venue and time.
+    ordered = sorted(candidates, key=lambda r: (r['venue_id'], r['start_time']))
+    for previous, result in zip(ordered, ordered[1:]):
+        if previous['venue_id'] == result['venue_id'] and result['start_time'] - previous['start_time'] < window:
+            result['errors'].append(f'clashes with row {previous["row"]} at the same venue')
+
+
+def schedule_shows(rows, partial=False):
+    # rows: mappings with artist_id, venue_id and start_time (strings or
+    # values). Returns one result per row, in order, with 'id' set for the
+    # shows created, and commits. Nothing is written when no row is created.
+    results = [_parse(number, row) for number, row in enumerate(rows, 1)]
+    window = timedelta(minutes=current_app.config['SHOW_BOOKING_WINDOW_MINUTES'])
+    _check_references(results)
+    _check_bookings(results, window)
+    valid = [r for r in results if not r['errors']]
+    if not valid or (len(valid) < len(results) and not partial):
+        db.session.rollback()
+        return results
+    ids = db.session.execute(
+        db.insert(Show).returning(Show.id, sort_by_parameter_order=True),
+        [{'artist_id': r['artist_id'], 'venue_id': r['venue_id'], 'start_time': r['start_time']} for r in valid],
+    ).scalars().all()
+    db.session.commit()
+    stick_to_primary()  # a Core insert: the after_flush hook doesn't see it
+    for result, show_id in zip(valid, ids):
+        result['id'] = show_id
+    return results
@@ -0,0 +1,94 @@
+#----------------------------------------------------------------------------#
+# Soft delete
+#----------------------------------------------------------------------------#
+
+# With SOFT_DELETE on, deleting a venue or artist stamps deleted_at instead of
+# removing the row, and purge_deleted() (`flask purge-deleted`, run from cron)
+# removes the rows deleted more than SOFT_DELETE_RETENTION_DAYS ago, a batch
+# at a time. Either way every ORM SELECT run through the session leaves
+# soft-deleted venues and artists out, in joins and subqueries too, and so
+# hides their shows wherever a query joins them; the execution option
+# include_deleted=True turns that off for one statement. Statements run
+# outside the session (async_db, EXPLAIN) go through live_only() instead, and
+# raw SQL has to test deleted_at itself.
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from counters import refresh_show_partners
+from extensions import db
+from models import Venue, Artist, Show
+
+SOFT_DELETE_MODELS = {Venue: Show.venue_id, Artist: Show.artist_id}
+
+_LIVE_ONLY = tuple(
+    with_loader_criteria(model, model.deleted_at.is_(None), include_aliases=True)
+    for model in SOFT_DELETE_MODELS
+)
+
+
+def live_only(statement):
+    return statement.options(*_LIVE_ONLY)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_deleted(orm_execute_state):
+    # Relationship and column loads inherit the criteria from the statement
+    # that loaded their parent.
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.is_relationship_load
+        and not orm_execute_state.execution_options.get('include_deleted', False)
+    ):
+        orm_execute_state.statement = live_only(orm_execute_state.statement)
+
+
+def delete_entity(entity):
+    # A hard delete is a single DELETE: ON DELETE CASCADE removes the shows,
+    # and passive_deletes keeps the ORM from loading them first. A soft
+    # delete leaves the shows to the purge and recounts the other side of
+    # them, which stops counting them.
+    if not current_app.config['SOFT_DELETE']:
+        db.session.delete(entity)
+        return
+    entity.deleted_at = db.func.timezone('utc', db.func.now())
+    db.session.flush()
+    refresh_show_partners(SOFT_DELETE_MODELS[type(entity)] == entity.id)
+
+
+def _delete_batch(model, criterion, batch_size):
+    # The primary key of "Show" is (id, start_time), so batches are chosen
+    # on both.
+    if model is Show:
+        key = db.tuple_(Show.id, Show.start_time)
+        batch = db.select(Show.id, Show.start_time)
+    else:
+        key = model.id
+        batch = db.select(model.id)
+    statement = db.delete(model).where(key.in_(batch.where(criterion).limit(batch_size)))
+    count = db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return count
+
+
+def purge_deleted(model, before, batch_size, on_batch=None):
+    # Removes the rows of `model` soft-deleted before `before`. Their shows go
+    # first, batch_size at a time, so no transaction holds a large venue's
+    # shows locked; the rows themselves follow, then cascade over nothing.
+    # Each batch commits on its own. Returns (shows, rows) removed.
+    deleted = model.deleted_at < before
+    totals = {Show: 0, model: 0}
+    for target, criterion in (
+        (Show, SOFT_DELETE_MODELS[model].in_(db.select(model.id).where(deleted))),
+        (model, deleted),
+    ):
+        while True:
+            count = _delete_batch(target, criterion, batch_size)
+            if not count:
+                break
+            totals[target] += count
+            if on_batch is not None:
+                on_batch(target, count)
+    return totals[Show], totals[model]
@@ -0,0 +1,46 @@
+// Past shows on venue and artist pages: a button's data-next URL returns the
+// next page of tiles as an HTML fragment, ending in the button for the page
+// after. The first page loads on click; later ones (data-auto) as soon as
+// their button scrolls into view.
+(function ($) {
+  var observer = null;
+
+  function load($button) {
+    if ($button.prop('disabled')) {
+      return;
+    }
+    $button.prop('disabled', true);
+    $.get($button.data('next'))
+      .done(function (html) {
+        $button.parent().replaceWith(html);
+        observe();
+      })
+      .fail(function () {
+        $button.prop('disabled', false);
+      });
+  }
+
+  function observe() {
+    if (!observer) {
+      return;
+    }
+    $('[data-past-shows] [data-auto]').each(function () {
+      observer.observe(this);
+    });
+  }
+
+  if (window.IntersectionObserver) {
+    observer = new IntersectionObserver(function (entries) {
+      $.each(entries, function (_, entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          load($(entry.target));
+        }
+      });
+    }, {rootMargin: '200px'});
+  }
+
+  $(document).on('click', '[data-past-shows] [data-next]', function () {
+    load($(this));
+  });
+})(window.jQuery);
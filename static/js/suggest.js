@@ -0,0 +1,107 @@
+// Typeahead for inputs marked data-suggest="venue|artist": queries
+// data-url (/api/suggest) as the user types and, when a suggestion is
+// picked, stores its id in the hidden input next to it named by data-target.
+// $(input).suggest() sets up inputs added later, e.g. the tour form's rows.
+(function ($) {
+  $.fn.suggest = function () {
+    return this.each(function () {
+      var $input = $(this);
+      var $target = $input.parent().find('input[name="' + $input.data('target') + '"]');
+      var $menu = $('<ul class="dropdown-menu"></ul>').insertAfter($input);
+      var timer = null;
+      var sequence = 0;
+      var active = -1;
+
+      function close() {
+        $menu.hide().empty();
+        active = -1;
+      }
+
+      function pick(item) {
+        $input.val(item.name);
+        $target.val(item.id);
+        close();
+      }
+
+      function highlight(index) {
+        var $items = $menu.children();
+        active = Math.max(-1, Math.min(index, $items.length - 1));
+        $items.removeClass('active').eq(active).addClass('active');
+      }
+
+      function render(items) {
+        $menu.empty();
+        $.each(items, function (_, item) {
+          $('<li><a href="#"></a></li>')
+            .find('a').text(item.label).end()
+            .on('mousedown', function (event) {
+              event.preventDefault();
+              pick(item);
+            })
+            .data('item', item)
+            .appendTo($menu);
+        });
+        active = -1;
+        $menu.toggle(items.length > 0);
+      }
+
+      function lookup() {
+        var query = $.trim($input.val());
+        var current = ++sequence;
+        if (!query) {
+          close();
+          return;
+        }
+        $.getJSON($input.data('url'), {type: $input.data('suggest'), q: query, limit: 10})
+          .done(function (response) {
+            // Ignore answers that arrive after a newer keystroke's.
+            if (current === sequence) {
+              render(response.data);
+            }
+          });
+      }
+
+      $input.on('input', function () {
+        $target.val('');
+        clearTimeout(timer);
+        timer = setTimeout(lookup, 120);
+      });
+
+      $input.on('keydown', function (event) {
+        if (!$menu.is(':visible')) {
+          return;
+        }
+        if (event.which === 40) {
+          highlight(active + 1);
+          event.preventDefault();
+        } else if (event.which === 38) {
+          highlight(active - 1);
+          event.preventDefault();
+        } else if (event.which === 13 && active >= 0) {
+          pick($menu.children().eq(active).data('item'));
+          event.preventDefault();
+        } else if (event.which === 27) {
+          close();
+        }
+      });
+
+      $input.on('blur', close);
+    });
+  };
+
+  $('input[data-suggest]').suggest();
+
+  // Tour form: add and remove date rows.
+  $('#batch-add').on('click', function () {
+    var $row = $('#batch-rows tbody tr:last');
+    var $copy = $row.clone().removeClass('danger');
+    $copy.find('.dropdown-menu, .text-danger').remove();
+    $copy.find('input').val('');
+    $copy.insertAfter($row).find('input[data-suggest]').suggest();
+  });
+  $('#batch-rows').on('click', '.batch-remove', function () {
+    if ($('#batch-rows tbody tr').length > 1) {
+      $(this).closest('tr').remove();
+    }
+  });
+})(window.jQuery);
@@ -0,0 +1,190 @@
+#----------------------------------------------------------------------------#
+# Venue and artist name suggestions
+#----------------------------------------------------------------------------#
+
+# /api/suggest answers the new-show form's typeahead from an in-process index
+# instead of the database. Each index is a sorted list of keys with a
+# parallel list of ids, one key per word of the normalized name ("the musical
+# hop", "musical hop", "hop"), so a prefix lookup is a bisect followed by a
+# short scan.
+# Every worker builds its own copy: at startup (SUGGEST_WARMUP) or on first
+# use, and again once it is older than SUGGEST_REFRESH_SECONDS. The create,
+# edit and delete routes update the worker that served them straight away;
+# other workers catch up at their next refresh.
+
+import bisect
+import re
+import sys
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models import Venue, Artist
+
+SUGGEST_MODELS = {'venue': Venue, 'artist': Artist}
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    # Case- and accent-insensitive, punctuation treated as spaces.
+    text = text or ''
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _SEPARATORS.sub(' ', text.casefold()).strip()
+
+
+def _keys(name):
+    words = normalize(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []
+        self._ids = []
+        self._names = {}
+        self._lock = threading.Lock()
+        self._rebuilding = threading.Lock()
+        self.built_at = None
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def build(self, rows):
+        # rows: (id, name, city, state). Swapped in whole, so lookups never
+        # see a half-built index.
+        names = {}
+        keys = []
+        ids = []
+        for entity_id, name, city, state in rows:
+            names[entity_id] = (name, city, state)
+            for key in _keys(name):
+                keys.append(key)
+                ids.append(entity_id)
+        # Sorting positions by key compares strings only, not tuples.
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        keys = [keys[i] for i in order]
+        ids = [ids[i] for i in order]
+        with self._lock:
+            self._keys, self._ids, self._names = keys, ids, names
+            self.built_at = time.monotonic()
+        self.nbytes = self._measure()
+
+    def _measure(self):
+        # Lists, dict, tuples and strings; ids are counted as 28-byte ints.
+        size = sum(sys.getsizeof(part) for part in (self._keys, self._ids, self._names))
+        size += sum(map(sys.getsizeof, self._keys)) + 28 * (len(self._ids) + len(self._names))
+        for entry in self._names.values():
+            size += sys.getsizeof(entry) + sum(map(sys.getsizeof, entry))
+        return size
+
+    def _remove(self, entity_id):
+        entry = self._names.pop(entity_id, None)
+        if entry is not None:
+            for key in _keys(entry[0]):
+                i = bisect.bisect_left(self._keys, key)
+                while i < len(self._keys) and self._keys[i] == key:
+                    if self._ids[i] == entity_id:
+                        del self._keys[i], self._ids[i]
+                        break
+                    i += 1
+
+    def add(self, entity_id, name, city, state):
+        with self._lock:
+            self._remove(entity_id)
+            self._names[entity_id] = (name, city, state)
+            for key in _keys(name):
+                i = bisect.bisect_right(self._keys, key)
+                self._keys.insert(i, key)
+                self._ids.insert(i, entity_id)
+
+    def remove(self, entity_id):
+        with self._lock:
+            self._remove(entity_id)
+
+    def search(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            i = bisect.bisect_left(self._keys, prefix)
+            while len(results) < limit and i < len(self._keys):
+                if not self._keys[i].startswith(prefix):
+                    break
+                entity_id = self._ids[i]
+                if entity_id not in seen:
+                    seen.add(entity_id)
+                    name, city, state = self._names[entity_id]
+                    results.append({
+                        'id': entity_id,
+                        'name': name,
+                        'label': f'{name} ({city}, {state})',
+                    })
+                i += 1
+        return results
+
+
+def build_index(kind, index):
+    model = SUGGEST_MODELS[kind]
+    started = time.perf_counter()
+    rows = db.session.execute(db.select(model.id, model.name, model.city, model.state)).all()
+    index.build(rows)
+    budget = current_app.config['SUGGEST_MEMORY_BUDGET_MB'] * 1024 * 1024
+    log = current_app.logger.warning if index.nbytes > budget else current_app.logger.info
+    log(
+        'Built the %s suggest index: %d names, %.1f MB of a %d MB budget, in %.0fms',
+        kind, len(index), index.nbytes / 1024 / 1024,
+        current_app.config['SUGGEST_MEMORY_BUDGET_MB'], (time.perf_counter() - started) * 1000,
+    )
+
+
+def suggest_index(kind):
+    # Builds on first use. A stale index is rebuilt by whichever request
+    # notices first; concurrent requests keep answering from the old one.
+    index = current_app.extensions['suggest'][kind]
+    if index.built_at is None:
+        with index._rebuilding:
+            if index.built_at is None:
+                build_index(kind, index)
+    elif time.monotonic() - index.built_at > current_app.config['SUGGEST_REFRESH_SECONDS']:
+        if index._rebuilding.acquire(blocking=False):
+            try:
+                build_index(kind, index)
+            finally:
+                index._rebuilding.release()
+    return index
+
+
+def index_entity(kind, entity):
+    # Called after a commit; an index that isn't built yet will read the row.
+    index = current_app.extensions['suggest'][kind]
+    if index.built_at is not None:
+        index.add(entity.id, entity.name, entity.city, entity.state)
+
+
+def unindex_entity(kind, entity_id):
+    current_app.extensions['suggest'][kind].remove(entity_id)
+
+
+def init_app(app):
+    app.extensions['suggest'] = {kind: PrefixIndex() for kind in SUGGEST_MODELS}
+
+
+def warm_suggest(app):
+    with app.app_context():
+        try:
+            for kind in SUGGEST_MODELS:
+                build_index(kind, app.extensions['suggest'][kind])
+        except SQLAlchemyError:
+            # No database yet (or not migrated): build on first use instead.
+            app.logger.warning('Could not build the suggest indexes at startup', exc_info=True)
+        finally:
+            db.session.remove()
@@ -0,0 +1,49 @@
+#----------------------------------------------------------------------------#
+# Template compilation
+#----------------------------------------------------------------------------#
+
+# Compiled templates are kept in a FileSystemBytecodeCache under
+# TEMPLATE_CACHE_DIR, keyed by a checksum of the source, so a new worker loads
+# bytecode instead of recompiling and an edited template is never served
+# stale. `flask templates compile` fills the cache at build time, and with
+# TEMPLATE_WARMUP each process renders every template once at startup so the
+# first requests don't pay for it.
+
+import time
+from pathlib import Path
+
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+
+def init_app(app):
+    if app.config['TEMPLATE_CACHE_DIR']:
+        Path(app.config['TEMPLATE_CACHE_DIR']).mkdir(parents=True, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
+
+
+def compile_templates(app):
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def warm_templates(app):
+    # Loading compiles (or reads bytecode); rendering with an empty context
+    # also warms the filters and macros. Templates that need a form object
+    # can't render that way, and are still compiled by then.
+    started = time.perf_counter()
+    names = compile_templates(app)
+    rendered = 0
+    with app.test_request_context('/'):
+        for name in names:
+            try:
+                app.jinja_env.get_template(name).render()
+            except (TemplateError, TypeError, AttributeError):
+                continue
+            rendered += 1
+    app.logger.debug(
+        'Warmed %d templates (%d rendered) in %.0fms',
+        len(names), rendered, (time.perf_counter() - started) * 1000,
+    )
+    return len(names), rendered
@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.seed import seed
+from commands import check_plans, run_plan_checks
+from extensions import db
+from tests.conftest import needs_database
+
+pytestmark = needs_database
+
+
+@pytest.fixture(scope='module')
+def seeded_app(database_app):
+    # Enough rows that the planner only picks an index where one pays off.
+    # Seeding deletes every venue, artist and show first.
+    with database_app.app_context():
+        seed(50000, 50000, 500000, log=lambda message: None)
+    return database_app
+
+
+def test_route_queries_read_through_their_indexes(seeded_app):
+    result = seeded_app.test_cli_runner().invoke(check_plans)
+    assert result.exit_code == 0, result.output
+
+
+def test_a_missing_index_fails_the_check(seeded_app):
+    lines = []
+    with seeded_app.app_context():
+        # run_plan_checks() rolls back, which restores the index.
+        db.session.execute(db.text('DROP INDEX "ix_Venue_state_city_id"'))
+        failures = run_plan_checks(lines.append)
+    assert failures == 1
+    assert any(line.startswith('FAIL venues:') for line in lines)
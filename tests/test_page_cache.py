@@ -0,0 +1,50 @@
+from flask import flash, g, request
+
+from cache import CLEAR_BATCH_SIZE, LocalClient, SharedCache, get_page, render_page
+
+
+def test_flashed_page_is_not_cached(app):
+    @app.route('/_cached')
+    def cached_page():
+        html = get_page('test:1')
+        if html is not None:
+            return html
+        if request.args.get('flash'):
+            flash('Venue X was successfully listed!')
+        return render_page('test:1', 'pages/home.html')
+
+    client = app.test_client()
+    first = client.get('/_cached?flash=1')
+    assert b'Venue X was successfully listed!' in first.data
+    second = client.get('/_cached')
+    assert b'Venue X was successfully listed!' not in second.data
+    # The clean page is cached, and other visitors don't see the banner.
+    third = app.test_client().get('/_cached')
+    assert third.data == second.data
+
+
+class _Validator:
+    def __init__(self, etag):
+        self.etag = etag
+
+
+def test_cached_page_is_served_only_with_its_etag(app):
+    with app.test_request_context('/'):
+        g.validator = _Validator('a' * 32)
+        render_page('test:2', 'pages/home.html')
+        assert get_page('test:2') is not None
+        # A write the cache never heard of moves the ETag on.
+        g.validator = _Validator('b' * 32)
+        assert get_page('test:2') is None
+
+
+def test_shared_cache_clear_leaves_other_keys_alone():
+    client = LocalClient()
+    client.set('session:abc', 'keep')
+    cache = SharedCache(client, 60)
+    for venue_id in range(CLEAR_BATCH_SIZE + 1):
+        cache.set(f'venue:{venue_id}', 'html')
+    cache.clear()
+    assert cache.get('venue:0') is None
+    assert list(client.scan_iter(match=cache.prefix + '*')) == []
+    assert client.get('session:abc') == 'keep'
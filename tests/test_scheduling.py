@@ -0,0 +1,104 @@
+import time
+
+from flask import session
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+import scheduling
+from extensions import db
+from models import Venue, Artist, Show
+from tests.conftest import needs_database
+
+TOUR = [
+    {'artist_id': '1', 'venue_id': '2', 'start_time': '2300-01-01 20:00'},
+    {'artist_id': '1', 'venue_id': '2', 'start_time': '2300-01-08 20:00'},
+    {'artist_id': '1', 'venue_id': '3', 'start_time': '2300-01-15 20:00'},
+]
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def one(self):
+        return self._rows
+
+    def all(self):
+        return self._rows
+
+    def scalars(self):
+        return self
+
+
+def _record_statements(monkeypatch, replies):
+    # Stands in for the database: records each statement with its parameters
+    # and answers with the next reply.
+    statements = []
+    replies = iter(replies)
+
+    def execute(statement, params=None, **kwargs):
+        statements.append((statement, params))
+        return _Result(next(replies))
+
+    monkeypatch.setattr(db.session, 'execute', execute)
+    monkeypatch.setattr(db.session, 'commit', lambda: None)
+    return statements
+
+
+def test_one_locking_check_and_one_multi_row_insert(app, monkeypatch):
+    with app.test_request_context('/shows/batch', method='POST'):
+        statements = _record_statements(monkeypatch, [([2, 3], [1]), [], [7, 8, 9]])
+        results = scheduling.schedule_shows(TOUR)
+    assert [result['id'] for result in results] == [7, 8, 9]
+    (references, _), (bookings, _), (insert, params) = statements
+
+    dialect = postgresql.dialect()
+    references = str(references.compile(dialect=dialect))
+    assert 'FOR NO KEY UPDATE' in references
+    assert 'ORDER BY "Venue".id' in references
+    bookings = str(bookings.compile(dialect=dialect))
+    assert 'FROM (VALUES' in bookings
+    assert 'JOIN "Show" ON "Show".venue_id = requested.venue_id' in bookings
+    # One INSERT for the whole tour, its parameters a list of rows.
+    compiled = str(insert.compile(dialect=dialect, column_keys=list(params[0])))
+    assert compiled.startswith('INSERT INTO "Show" (venue_id, artist_id, start_time)')
+    assert compiled.endswith('RETURNING "Show".id')
+    assert [row['venue_id'] for row in params] == [2, 2, 3]
+
+
+def test_scheduling_pins_the_session_to_the_primary(app, monkeypatch):
+    with app.test_request_context('/shows/create', method='POST'):
+        _record_statements(monkeypatch, [([2], [1]), [], [7]])
+        results = scheduling.schedule_shows(TOUR[:1])
+        assert results[0]['id'] == 7
+        assert session['primary_until'] > time.time()
+
+
+@needs_database
+def test_tour_is_locked_and_inserted_in_one_statement_each(database_app):
+    with database_app.test_request_context('/shows/batch', method='POST'):
+        venue = Venue(name='Test Hall', city='Austin', state='TX', address='1 Main St', genres=['Jazz'])
+        artist = Artist(name='Test Band', city='Austin', state='TX', genres=['Jazz'])
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        tour = [dict(row, artist_id=artist.id, venue_id=venue.id) for row in TOUR[:2]]
+        sql = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            sql.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            results = scheduling.schedule_shows(tour)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+            db.session.execute(db.delete(Show).where(Show.venue_id == venue.id))
+            db.session.execute(db.delete(Venue).where(Venue.id == venue.id))
+            db.session.execute(db.delete(Artist).where(Artist.id == artist.id))
+            db.session.commit()
+    assert all('id' in result for result in results)
+    assert sum('FOR NO KEY UPDATE' in statement for statement in sql) == 1
+    inserts = [statement for statement in sql if statement.startswith('INSERT INTO "Show"')]
+    # SQLAlchemy sends the rows as one INSERT ... SELECT FROM (VALUES ...).
+    assert len(inserts) == 1
+    assert inserts[0].count('%(venue_id__') == 2